@@ -1,46 +1,250 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, jsonify, Response, stream_with_context, g
+import csv
+import cProfile
 from werkzeug.utils import secure_filename
 import os
 import json
 import pandas as pd
-import numpy as np
 import logging
 from datetime import datetime
+from utils.dataset_store import DatasetStore, frame_to_records, coerce_types, file_signature
+from utils.fileio import atomic_write, file_lock
+from utils.dataset_query import parse_query, apply_query
+from utils.model_loader import ModelRegistry
+from utils.analytics import ANALYSES
+from utils.jobs import JobManager
+from utils.tasks import analytics_worker, init_worker, run_analytics_task
+from utils.batch import run_batch, batch_worker
+from utils.result_cache import ResultCache, cache_key
+from utils.ingest import ingest_stream
+from utils.online_stats import LiveStreamRegistry
+from utils.forecasting import is_predefined, forecast_options, FORECASTER_VERSION
+from utils.rollups import RollupStore, GRANULARITIES
+from utils.catalog import Catalog
+from utils import metrics
+from utils.serialization import FORMATS, negotiate_format, negotiate_encoding, compress, iter_frame, iter_results
+from utils.metrics import phase
+from utils.validator import validate_file
 
 app = Flask(__name__)
 app.config['DATASET_FOLDER'] = os.path.join(os.getcwd(), 'data', 'datasets')
 app.config['MODEL_FOLDER'] = os.path.join(os.getcwd(), 'data', 'models')
+app.config['CACHE_FOLDER'] = os.path.join(os.getcwd(), 'data', 'cache')
+app.config['DATASET_CACHE_FOLDER'] = os.path.join(app.config['CACHE_FOLDER'], 'datasets')
+app.config['ROLLUP_FOLDER'] = os.path.join(app.config['CACHE_FOLDER'], 'rollups')
+app.config['RESULT_CACHE_FOLDER'] = os.path.join(app.config['CACHE_FOLDER'], 'results')
+app.config['CATALOG_PATH'] = os.path.join(os.getcwd(), 'data', 'catalog.sqlite3')
+app.config['JOB_FOLDER'] = os.path.join(os.getcwd(), 'data', 'jobs')
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16 MB max upload size
+app.config['STREAM_UPLOAD_MAX_LENGTH'] = 1024 ** 4  # 1 TB, i.e. unbounded, for POST /api/datasets/stream
+app.config['INGEST_CHUNK_ROWS'] = 50000  # rows held in memory at once by streaming ingest
+app.config['FRAME_CACHE_MAX_BYTES'] = 512 * 1024 * 1024  # in-memory parsed dataset budget, shared by all processes
+app.config['STREAM_CHUNK_ROWS'] = 5000  # rows serialized per chunk of a streamed response
+app.config['MODEL_CACHE_MAX_BYTES'] = 1024 * 1024 * 1024  # loaded model budget, shared by all processes
+# Comma-separated model ids loaded at startup, e.g. OEE360_PREWARM_MODELS=xgb.joblib
+app.config['MODEL_PREWARM'] = [m for m in os.environ.get('OEE360_PREWARM_MODELS', '').split(',') if m]
+app.config['RESULT_CACHE_MAX_BYTES'] = 256 * 1024 * 1024  # on-disk analytics result cache
+app.config['RESULT_CACHE_MEMORY_ENTRIES'] = 64
+app.config['LIVE_WINDOW_ROWS'] = 60  # rows in the rolling live OEE window
+app.config['LIVE_KEEPALIVE_SECONDS'] = 15  # idle interval between SSE keep-alive comments
+app.config['LIVE_MAX_STREAMS'] = 100  # live streams held in memory at once
+app.config['ANALYTICS_WORKERS'] = int(os.environ.get('OEE360_ANALYTICS_WORKERS', 0)) or None  # None = one per core
+# With OEE360_PROFILING=1, ?profile=1 or an "X-Profile: 1" header returns a cProfile breakdown instead of the response
+app.config['PROFILING_ENABLED'] = os.environ.get('OEE360_PROFILING', '0') == '1'
+app.config['PROFILE_MAX_FUNCTIONS'] = 40
+app.config['COMPRESS_MIN_BYTES'] = 1024  # smaller analytics bodies are sent uncompressed
+app.config['BATCH_WORKERS'] = int(os.environ.get('OEE360_BATCH_WORKERS', 0)) or None  # threads per batch; None = executor default
+app.config['BATCH_MAX_PAIRS'] = 200  # dataset x model cells per POST /api/analytics/batch
+app.config['BATCH_INLINE_MAX_PAIRS'] = 4  # larger batches are queued as analytics jobs
 
 # Ensure directories exist
 os.makedirs(app.config['DATASET_FOLDER'], exist_ok=True)
 os.makedirs(app.config['MODEL_FOLDER'], exist_ok=True)
+os.makedirs(app.config['CACHE_FOLDER'], exist_ok=True)
+
+# Indexed listing of datasets and models, reconciled with the folders at startup
+catalog = Catalog(app.config['CATALOG_PATH'])
+catalog.sync(app.config['DATASET_FOLDER'], app.config['MODEL_FOLDER'])
+
+# The server process and each analytics worker keep their own frame and model caches,
+# so each gets an equal share of the configured budgets
+analytics_workers = app.config['ANALYTICS_WORKERS'] or os.cpu_count() or 1
+frame_cache_share = app.config['FRAME_CACHE_MAX_BYTES'] // (analytics_workers + 1)
+model_cache_share = app.config['MODEL_CACHE_MAX_BYTES'] // (analytics_workers + 1)
+
+# Typed columnar copies of uploaded datasets, shared by every route
+dataset_store = DatasetStore(
+    app.config['DATASET_FOLDER'],
+    app.config['DATASET_CACHE_FOLDER'],
+    frame_cache_share
+)
+
+# Hourly/daily/weekly/monthly/per-shift buckets answering coarse queries without raw rows
+rollup_store = RollupStore(app.config['ROLLUP_FOLDER'], dataset_store)
+
+# Loaded models, kept warm between requests
+model_registry = ModelRegistry(app.config['MODEL_FOLDER'], model_cache_share)
+model_registry.warm(app.config['MODEL_PREWARM'])
+
+# Settings each worker process opens its own stores with (and the models it warms) when it starts
+worker_config = {
+    'DATASET_FOLDER': app.config['DATASET_FOLDER'],
+    'DATASET_CACHE_FOLDER': app.config['DATASET_CACHE_FOLDER'],
+    'MODEL_FOLDER': app.config['MODEL_FOLDER'],
+    'FRAME_CACHE_MAX_BYTES': frame_cache_share,
+    'MODEL_CACHE_MAX_BYTES': model_cache_share,
+    'MODEL_PREWARM': app.config['MODEL_PREWARM']
+}
+
+# Analytics jobs run in a process pool; finished results are kept under JOB_FOLDER
+job_manager = JobManager(
+    app.config['JOB_FOLDER'], analytics_workers, initializer=init_worker, initargs=(worker_config,)
+)
+
+# Analytics results keyed on dataset/model content, analysisType and parameters
+result_cache = ResultCache(
+    app.config['RESULT_CACHE_FOLDER'],
+    app.config['RESULT_CACHE_MAX_BYTES'],
+    app.config['RESULT_CACHE_MEMORY_ENTRIES']
+)
+
+# Live-mode feeds with incrementally maintained statistics (kept in this process)
+live_streams = LiveStreamRegistry(app.config['LIVE_WINDOW_ROWS'], app.config['LIVE_MAX_STREAMS'])
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Request metrics (phase timings, bytes, counters) and the opt-in profiler
+@app.before_request
+def start_request_metrics():
+    g.request_metrics = metrics.begin_request(request.endpoint or 'unmatched')
+    if app.config['PROFILING_ENABLED'] and (request.args.get('profile') == '1' or request.headers.get('X-Profile') == '1'):
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+@app.after_request
+def finish_request_metrics(response):
+    state, token = g.pop('request_metrics', (None, None))
+    profiler = g.pop('profiler', None)
+    if profiler is not None and response.mimetype != 'text/event-stream':
+        # Drain streamed bodies while still profiling so serialization is included
+        body = response.get_data()
+        profiler.disable()
+        report = {
+            'status': response.status_code,
+            'responseBytes': len(body),
+            **state.to_dict(),
+            'profile': metrics.profile_report(
+                profiler, request.args.get('profileSort', 'cumulative'), app.config['PROFILE_MAX_FUNCTIONS']
+            )
+        }
+        response = jsonify(report)
+    elif profiler is not None:
+        profiler.disable()
+    
+    if state is not None:
+        metrics.end_request(
+            state, token, request.method, response.status_code,
+            bytes_in=request.content_length,
+            bytes_out=None if response.is_streamed else response.content_length
+        )
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    return Response(metrics.REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
 # Helper function to validate file types
 def allowed_file(filename, allowed_extensions):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in allowed_extensions
 
+# Helper function to serve a catalog listing with ETag / If-None-Match support
+def catalog_listing(table, key, list_items):
+    args = request.args.to_dict()
+    etag = catalog.etag(table, args)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+    
+    try:
+        items, total = list_items(args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    response = jsonify({key: items, 'total': total})
+    response.set_etag(etag)
+    return response
+
+# Helper function to send a body in the negotiated format, compressed if the client accepts it
+def negotiated_response(chunks, fmt, encoding, stream=True, status=200):
+    if stream:
+        if encoding:
+            chunks = compress(chunks, encoding)
+        response = Response(stream_with_context(metrics.timed_iter(chunks)), status=status, mimetype=FORMATS[fmt])
+    else:
+        with phase('serialize'):
+            body = b''.join(c.encode('utf-8') if isinstance(c, str) else c for c in chunks)
+            if encoding and len(body) >= app.config['COMPRESS_MIN_BYTES']:
+                body = b''.join(compress([body], encoding))
+            else:
+                encoding = None
+        response = Response(body, status=status, mimetype=FORMATS[fmt])
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.update(['Accept', 'Accept-Encoding'])
+    return response
+
+# Helper function to send analytics results (found at payload[path...]) in the negotiated format
+def analytics_response(payload, path, fmt, encoding, status=200):
+    if fmt == 'records' and not encoding:
+        with phase('serialize'):
+            return jsonify(payload), status
+    chunks = iter_results(payload, path, fmt, app.config['STREAM_CHUNK_ROWS'])
+    return negotiated_response(chunks, fmt, encoding, stream=fmt == 'arrow', status=status)
+
+# Helper function to (re)build a dataset's rollup index after it was written
+def build_rollups(dataset_id, df=None):
+    rollup_store.invalidate(dataset_id)
+    try:
+        with phase('index'):
+            rollup_store.build(dataset_id, df)
+    except Exception as e:
+        logger.warning(f"Could not build rollups for {dataset_id}: {e}")
+
+# Helper function to locate a dataset's stored validation report
+def validation_path(dataset_id):
+    return os.path.join(app.config['DATASET_CACHE_FOLDER'], dataset_id + '.validation.json')
+
+# Helper function to validate a dataset file, reusing the stored report while the file is unchanged
+def validation_report(dataset_id, refresh=False):
+    source = dataset_store.source_path(dataset_id)
+    report_path = validation_path(dataset_id)
+    signature = file_signature(source)
+    # Concurrent requests for one dataset wait for a single validation instead of each starting one
+    with file_lock(report_path):
+        if not refresh and os.path.exists(report_path):
+            try:
+                with open(report_path, 'r') as f:
+                    cached = json.load(f)
+                if cached['signature'] == signature:
+                    return cached['report']
+            except (OSError, ValueError, KeyError):
+                pass
+        
+        # Large CSVs are split across the analytics process pool, so validations share its bound
+        with phase('validate'):
+            report = validate_file(source, workers=analytics_workers, executor=job_manager.executor()).to_dict()
+        metrics.record_bytes_read('dataset', signature['size'])
+        with atomic_write(report_path) as f:
+            json.dump({'signature': signature, 'report': report}, f)
+        return report
+
 # Dataset routes
 @app.route('/api/datasets', methods=['GET'])
 def get_datasets():
     try:
-        datasets = []
-        for file in os.listdir(app.config['DATASET_FOLDER']):
-            if file.endswith('.csv') or file.endswith('.json'):
-                file_path = os.path.join(app.config['DATASET_FOLDER'], file)
-                stats = os.stat(file_path)
-                datasets.append({
-                    'id': file,
-                    'name': file,
-                    'size': stats.st_size,
-                    'lastModified': datetime.fromtimestamp(stats.st_mtime).isoformat(),
-                    'type': file.rsplit('.', 1)[1]
-                })
-        return jsonify({'datasets': datasets})
+        return catalog_listing('datasets', 'datasets', catalog.list_datasets)
     except Exception as e:
         logger.error(f"Error reading datasets: {e}")
         return jsonify({'error': 'Failed to read datasets'}), 500
@@ -62,14 +266,84 @@ def upload_dataset():
         file_path = os.path.join(app.config['DATASET_FOLDER'], filename)
         file.save(file_path)
         
-        return jsonify({
+        # Parse once into the typed columnar cache so later reads skip the CSV
+        dataset_store.invalidate(filename)
+        result_cache.invalidate(dataset_id=filename)
+        try:
+            df = dataset_store.convert(filename)
+            build_rollups(filename, df)
+            catalog.upsert_dataset(
+                filename, file_path,
+                sha256=dataset_store.cached_signature(filename)['sha256'],
+                rows=len(df),
+                schema={str(column): str(dtype) for column, dtype in df.dtypes.items()}
+            )
+        except Exception as e:
+            logger.warning(f"Could not build columnar cache for {filename}: {e}")
+            catalog.upsert_dataset(filename, file_path)
+        
+        response = {
             'message': 'File uploaded successfully',
             'filename': filename
-        })
+        }
+        if request.args.get('validate') == '1':
+            try:
+                response['validation'] = validation_report(filename, refresh=True)
+            except (ValueError, pd.errors.ParserError) as e:
+                response['validation'] = {'valid': False, 'error': str(e)}
+        return jsonify(response)
     except Exception as e:
         logger.error(f"Error uploading dataset: {e}")
         return jsonify({'error': 'Failed to upload dataset'}), 500
 
+@app.route('/api/datasets/stream', methods=['POST'])
+def stream_upload_dataset():
+    try:
+        # The raw request body is the CSV; it is never held in memory as a whole
+        request.max_content_length = app.config['STREAM_UPLOAD_MAX_LENGTH']
+        
+        filename = secure_filename(request.args.get('filename', ''))
+        if not filename:
+            return jsonify({'error': 'No filename provided'}), 400
+        
+        if not allowed_file(filename, ['csv']):
+            return jsonify({'error': 'Invalid file type. Only CSV files can be streamed.'}), 400
+        
+        try:
+            with phase('parse'):
+                schema, report = ingest_stream(
+                    request.stream, dataset_store, filename, app.config['INGEST_CHUNK_ROWS'],
+                    strict=request.args.get('strict') == '1'
+                )
+        except (ValueError, pd.errors.ParserError) as e:
+            return jsonify({'error': f"Invalid dataset: {e}"}), 400
+        
+        # strict=1: a file that fails validation was discarded and any existing dataset kept
+        validation = report.to_dict()
+        if request.args.get('strict') == '1' and not validation['valid']:
+            return jsonify({'error': 'Dataset failed validation', 'validation': validation}), 422
+        result_cache.invalidate(dataset_id=filename)
+        
+        build_rollups(filename)
+        catalog.upsert_dataset(
+            filename, dataset_store.source_path(filename),
+            sha256=dataset_store.cached_signature(filename)['sha256'],
+            rows=validation['rows'],
+            schema=schema
+        )
+        
+        return jsonify({
+            'message': 'File uploaded successfully',
+            'filename': filename,
+            'rows': validation['rows'],
+            'size': os.path.getsize(dataset_store.source_path(filename)),
+            'schema': schema,
+            'validation': validation
+        })
+    except Exception as e:
+        logger.error(f"Error streaming dataset upload: {e}")
+        return jsonify({'error': 'Failed to upload dataset'}), 500
+
 @app.route('/api/datasets/<id>', methods=['GET'])
 def get_dataset(id):
     try:
@@ -78,16 +352,30 @@ def get_dataset(id):
         if not os.path.exists(file_path):
             return jsonify({'error': 'Dataset not found'}), 404
         
-        if id.endswith('.csv'):
-            df = pd.read_csv(file_path)
-            data = df.to_dict('records')
-        elif id.endswith('.json'):
-            with open(file_path, 'r') as f:
-                data = json.load(f)
-        else:
+        if not (id.endswith('.csv') or id.endswith('.json')):
             return jsonify({'error': 'Unsupported file format'}), 400
         
-        return jsonify({'data': data, 'filename': id})
+        try:
+            query = parse_query(request.args)
+            fmt = negotiate_format(request.args, request.accept_mimetypes)
+            encoding = negotiate_encoding(request.args, request.accept_encodings)
+            with phase('load'):
+                df = dataset_store.load(id)
+            with phase('compute'):
+                df, total = apply_query(df, query)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Stream the selected window instead of building the full record list
+        header = {
+            'filename': id,
+            'total': total,
+            'offset': query['offset'],
+            'limit': query['limit'],
+            'columns': [str(c) for c in df.columns]
+        }
+        chunks = iter_frame(df, header, fmt, app.config['STREAM_CHUNK_ROWS'])
+        return negotiated_response(chunks, fmt, encoding)
     except Exception as e:
         logger.error(f"Error reading dataset: {e}")
         return jsonify({'error': 'Failed to read dataset'}), 500
@@ -101,38 +389,129 @@ def delete_dataset(id):
             return jsonify({'error': 'Dataset not found'}), 404
         
         os.remove(file_path)
+        report_path = validation_path(id)
+        if os.path.exists(report_path):
+            os.remove(report_path)
+        catalog.delete_dataset(id)
+        dataset_store.invalidate(id)
+        rollup_store.invalidate(id)
+        result_cache.invalidate(dataset_id=id)
         return jsonify({'message': 'Dataset deleted successfully'})
     except Exception as e:
         logger.error(f"Error deleting dataset: {e}")
         return jsonify({'error': 'Failed to delete dataset'}), 500
 
-# Model routes
-@app.route('/api/models', methods=['GET'])
-def get_models():
+@app.route('/api/datasets/<id>/rows', methods=['POST'])
+def append_dataset_rows(id):
     try:
-        models = []
-        for file in os.listdir(app.config['MODEL_FOLDER']):
-            file_path = os.path.join(app.config['MODEL_FOLDER'], file)
-            stats = os.stat(file_path)
+        file_path = os.path.join(app.config['DATASET_FOLDER'], id)
+        
+        if not os.path.exists(file_path):
+            return jsonify({'error': 'Dataset not found'}), 404
+        
+        if not id.endswith('.csv'):
+            return jsonify({'error': 'Rows can only be appended to CSV datasets'}), 400
+        
+        data = request.json
+        rows = data.get('rows', [data]) if isinstance(data, dict) else data
+        if not isinstance(rows, list) or not rows or not all(isinstance(row, dict) for row in rows):
+            return jsonify({'error': 'Expected a row object, a list of rows or {"rows": [...]}'}), 400
+        
+        # One append at a time per dataset, so the file, rollups and catalog move together
+        with dataset_store.lock(id):
+            previous_signature = file_signature(file_path)
             
-            # Check if there's a metadata file
-            metadata = {}
-            metadata_path = os.path.join(app.config['MODEL_FOLDER'], f"{file}.metadata.json")
-            if os.path.exists(metadata_path):
-                with open(metadata_path, 'r') as f:
-                    metadata = json.load(f)
+            # Append in the file's own column order
+            with open(file_path, 'r', newline='') as f:
+                header = next(csv.reader(f))
+            with open(file_path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                needs_newline = f.read(1) != b'\n'
+            with open(file_path, 'a', newline='') as f:
+                if needs_newline:
+                    f.write('\n')
+                writer = csv.DictWriter(f, fieldnames=header, extrasaction='ignore')
+                writer.writerows(rows)
             
-            models.append({
-                'id': file,
-                'name': file,
-                'size': stats.st_size,
-                'lastModified': datetime.fromtimestamp(stats.st_mtime).isoformat(),
-                'type': file.rsplit('.', 1)[1] if '.' in file else 'unknown',
-                'description': metadata.get('description', ''),
-                'accuracy': metadata.get('accuracy', None),
-                'version': metadata.get('version', '1.0')
+            # The rollup index absorbs the new rows; other caches rebuild on next use
+            dataset_store.invalidate(id)
+            result_cache.invalidate(dataset_id=id)
+            try:
+                rollup_store.merge(id, coerce_types(pd.DataFrame(rows, columns=header)), previous_signature)
+            except ValueError as e:
+                logger.warning(f"Could not merge rows into rollups for {id}: {e}")
+            catalog.append_dataset(id, file_path, len(rows))
+        
+        return jsonify({'message': 'Rows appended successfully', 'rows': len(rows)})
+    except Exception as e:
+        logger.error(f"Error appending dataset rows: {e}")
+        return jsonify({'error': 'Failed to append rows'}), 500
+
+@app.route('/api/datasets/<id>/rollups', methods=['GET'])
+def get_dataset_rollups(id):
+    try:
+        if not os.path.exists(os.path.join(app.config['DATASET_FOLDER'], id)):
+            return jsonify({'error': 'Dataset not found'}), 404
+        
+        try:
+            with phase('compute'):
+                buckets = query_rollups(id, request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        with phase('serialize'):
+            return jsonify({
+                'datasetId': id,
+                'granularity': request.args.get('granularity', 'day'),
+                'buckets': frame_to_records(buckets)
             })
-        return jsonify({'models': models})
+    except Exception as e:
+        logger.error(f"Error reading dataset rollups: {e}")
+        return jsonify({'error': 'Failed to read dataset rollups'}), 500
+
+@app.route('/api/datasets/<id>/validation', methods=['GET'])
+def get_dataset_validation(id):
+    try:
+        if not os.path.exists(os.path.join(app.config['DATASET_FOLDER'], id)):
+            return jsonify({'error': 'Dataset not found'}), 404
+        
+        if not (id.endswith('.csv') or id.endswith('.json')):
+            return jsonify({'error': 'Unsupported file format'}), 400
+        
+        try:
+            report = validation_report(id, refresh=request.args.get('refresh') == '1')
+        except (ValueError, pd.errors.ParserError) as e:
+            return jsonify({'error': f"Invalid dataset: {e}"}), 400
+        
+        return jsonify({'datasetId': id, **report})
+    except Exception as e:
+        logger.error(f"Error validating dataset: {e}")
+        return jsonify({'error': 'Failed to validate dataset'}), 500
+
+# Helper function to answer a bucketed query from the rollup index
+def query_rollups(dataset_id, options):
+    granularity = options.get('granularity', 'day')
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unknown granularity '{granularity}'. Expected one of {GRANULARITIES}")
+    
+    def as_list(value):
+        if isinstance(value, str):
+            return [v.strip() for v in value.split(',') if v.strip()]
+        return value or None
+    
+    return rollup_store.get(dataset_id).query(
+        granularity,
+        start=options.get('start') or None,
+        end=options.get('end') or None,
+        metrics=as_list(options.get('metrics')),
+        stats=as_list(options.get('stats'))
+    )
+
+# Model routes
+@app.route('/api/models', methods=['GET'])
+def get_models():
+    try:
+        return catalog_listing('models', 'models', catalog.list_models)
     except Exception as e:
         logger.error(f"Error reading models: {e}")
         return jsonify({'error': 'Failed to read models'}), 500
@@ -150,13 +529,21 @@ def upload_model():
         filename = secure_filename(file.filename)
         file_path = os.path.join(app.config['MODEL_FOLDER'], filename)
         file.save(file_path)
+        model_registry.invalidate(filename)
+        result_cache.invalidate(model_id=filename)
         
         # Save metadata if provided
+        metadata = {}
+        metadata_path = os.path.join(app.config['MODEL_FOLDER'], f"{filename}.metadata.json")
         if 'metadata' in request.form:
             metadata = json.loads(request.form['metadata'])
-            metadata_path = os.path.join(app.config['MODEL_FOLDER'], f"{filename}.metadata.json")
             with open(metadata_path, 'w') as f:
                 json.dump(metadata, f)
+        elif os.path.exists(metadata_path):
+            with open(metadata_path, 'r') as f:
+                metadata = json.load(f)
+        
+        catalog.upsert_model(filename, file_path, metadata, sha256=model_registry.fingerprint(filename)[0])
         
         return jsonify({'message': 'Model uploaded successfully', 'filename': filename})
     except Exception as e:
@@ -172,6 +559,9 @@ def delete_model(id):
             return jsonify({'error': 'Model not found'}), 404
         
         os.remove(file_path)
+        catalog.delete_model(id)
+        model_registry.invalidate(id)
+        result_cache.invalidate(model_id=id)
         
         # Remove metadata if exists
         metadata_path = os.path.join(app.config['MODEL_FOLDER'], f"{id}.metadata.json")
@@ -183,7 +573,7 @@ def delete_model(id):
         logger.error(f"Error deleting model: {e}")
         return jsonify({'error': 'Failed to delete model'}), 500
 
-# Analytics route
+# Analytics routes
 @app.route('/api/analytics', methods=['POST'])
 def run_analytics():
     try:
@@ -201,70 +591,297 @@ def run_analytics():
         if not os.path.exists(dataset_path):
             return jsonify({'error': 'Dataset not found'}), 404
         
-        if not os.path.exists(model_path):
+        # Predefined models (SARIMA, LSTM, GRU) are built in and have no file
+        if not is_predefined(model_id) and not os.path.exists(model_path):
             return jsonify({'error': 'Model not found'}), 404
         
-        # Load dataset
-        if dataset_id.endswith('.csv'):
-            df = pd.read_csv(dataset_path)
-            dataset = df.to_dict('records')
-        elif dataset_id.endswith('.json'):
-            with open(dataset_path, 'r') as f:
-                dataset = json.load(f)
-        else:
+        if not (dataset_id.endswith('.csv') or dataset_id.endswith('.json')):
             return jsonify({'error': 'Unsupported dataset format'}), 400
         
-        # Perform analytics (simplified version)
-        analytics_results = perform_basic_analytics(dataset, analysis_type)
+        # Trend queries are answered from the rollup index in time proportional to buckets
+        if analysis_type == 'trend':
+            try:
+                with phase('compute'):
+                    buckets = query_rollups(dataset_id, data)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            with phase('serialize'):
+                return jsonify({
+                    'success': True,
+                    'datasetId': dataset_id,
+                    'modelId': model_id,
+                    'analysisType': analysis_type,
+                    'results': {
+                        'analysisType': analysis_type,
+                        'timestamp': datetime.now().isoformat(),
+                        'granularity': data.get('granularity', 'day'),
+                        'buckets': frame_to_records(buckets)
+                    }
+                })
         
-        return jsonify({
+        if analysis_type and analysis_type not in ANALYSES:
+            return jsonify({'error': f"Unknown analysis type '{analysis_type}'"}), 400
+        
+        # Response format: ?format=records|columnar|arrow or the Accept header; compression per Accept-Encoding
+        try:
+            fmt = negotiate_format(request.args, request.accept_mimetypes)
+            encoding = negotiate_encoding(request.args, request.accept_encodings)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if fmt == 'arrow' and analysis_type != 'forecast':
+            return jsonify({'error': 'Arrow output is only available for forecast results'}), 406
+        
+        # Identical dataset/model content, analysisType and parameters reuse a stored result
+        params = {
+            'horizon': data.get('horizon'),
+            'lookback': data.get('lookback'),
+            'groupBy': data.get('groupBy'),
+            'metrics': data.get('metrics')
+        }
+        try:
+            forecast_options(params)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if is_predefined(model_id):
+            model_hash, model_version = model_id, FORECASTER_VERSION
+        else:
+            model_hash, model_version = model_registry.fingerprint(model_id)
+            # Forecasts of uploaded models also change with the forecasting code
+            model_version = f"{model_version}/{FORECASTER_VERSION}"
+        
+        def result_key(dataset_hash):
+            return cache_key(dataset_hash, model_hash, model_version, analysis_type or 'basic', params)
+        
+        # Only a content hash already stored for the current file is used here; after an append or
+        # an outside change the task hashes the file while loading it, and the result is stored under that
+        known = dataset_store.known_signature(dataset_id)
+        key = result_key(known['sha256']) if known else None
+        response = {
             'success': True,
             'datasetId': dataset_id,
             'modelId': model_id,
-            'analysisType': analysis_type,
-            'results': analytics_results
+            'analysisType': analysis_type
+        }
+        
+        cached = result_cache.get(key) if key else None
+        if cached is not None:
+            response.update({
+                'results': cached['results'],
+                'cache': {'hit': True, 'key': key, 'computeSeconds': cached['computeSeconds']}
+            })
+            return analytics_response(response, ['results'], fmt, encoding)
+        
+        def store_result(output):
+            result_cache.put(result_key(output['datasetSha256']), output, dataset_id, model_id)
+        
+        def finish_job(output):
+            metrics.record_phases(output.get('phases', {}), 'analytics_job')
+            store_result(output)
+        
+        # "wait": true runs the analysis in this request, as before
+        if data.get('wait'):
+            try:
+                output = run_analytics_task(
+                    dataset_store, model_registry, dataset_id, model_id, analysis_type, params
+                )
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            store_result(output)
+            response.update({
+                'results': output['results'],
+                'cache': {
+                    'hit': False,
+                    'key': result_key(output['datasetSha256']),
+                    'computeSeconds': output['computeSeconds']
+                }
+            })
+            return analytics_response(response, ['results'], fmt, encoding)
+        
+        # Otherwise queue it in the process pool and return the job id straight away
+        job = job_manager.submit(
+            analytics_worker, dataset_id, model_id, analysis_type, params,
+            on_success=finish_job,
+            datasetId=dataset_id, modelId=model_id, analysisType=analysis_type,
+            cache={'hit': False, 'key': key}
+        )
+        response.update({
+            'jobId': job['id'],
+            'status': job['status'],
+            'statusUrl': f"/api/analytics/{job['id']}",
+            'cache': job['cache']
         })
+        return jsonify(response), 202
     except Exception as e:
         logger.error(f"Error performing analytics: {e}")
         return jsonify({'error': 'Failed to perform analytics'}), 500
 
-def perform_basic_analytics(data, analysis_type):
-    # This is a simplified analytics function
-    # In a real implementation, you would load and use the model here
-    results = {
-        'rowCount': len(data),
-        'timestamp': datetime.now().isoformat(),
-        'analysisType': analysis_type,
-        'summary': {}
-    }
-    
-    # Calculate basic statistics for numeric columns
-    if len(data) > 0:
-        numeric_columns = []
-        for key in data[0].keys():
+@app.route('/api/analytics/batch', methods=['POST'])
+def run_batch_analytics():
+    try:
+        data = request.json
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Expected a JSON object'}), 400
+        
+        ids = {}
+        for key in ('datasetIds', 'modelIds'):
+            value = data.get(key)
+            if not isinstance(value, list) or not value or not all(isinstance(v, str) and v for v in value):
+                return jsonify({'error': f"{key} must be a non-empty list of strings"}), 400
+            ids[key] = list(dict.fromkeys(value))
+        dataset_ids, model_ids = ids['datasetIds'], ids['modelIds']
+        pairs = len(dataset_ids) * len(model_ids)
+        
+        if pairs > app.config['BATCH_MAX_PAIRS']:
+            return jsonify({'error': f"At most {app.config['BATCH_MAX_PAIRS']} dataset/model pairs per batch"}), 400
+        
+        missing_datasets = [d for d in dataset_ids if not os.path.exists(os.path.join(app.config['DATASET_FOLDER'], d))]
+        missing_models = [
+            m for m in model_ids
+            if not is_predefined(m) and not os.path.exists(os.path.join(app.config['MODEL_FOLDER'], m))
+        ]
+        if missing_datasets or missing_models:
+            return jsonify({
+                'error': 'Dataset or model not found',
+                'missingDatasets': missing_datasets,
+                'missingModels': missing_models
+            }), 404
+        
+        if not all(d.endswith('.csv') or d.endswith('.json') for d in dataset_ids):
+            return jsonify({'error': 'Unsupported dataset format'}), 400
+        
+        params = {
+            'horizon': data.get('horizon'),
+            'lookback': data.get('lookback'),
+            'groupBy': data.get('groupBy'),
+            'metrics': data.get('metrics')
+        }
+        try:
+            forecast_options(params)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        response = {'success': True, 'datasetIds': dataset_ids, 'modelIds': model_ids}
+        
+        # Small batches are answered in this request; larger ones go to the analytics process pool
+        if pairs <= app.config['BATCH_INLINE_MAX_PAIRS']:
             try:
-                float(data[0][key])
-                numeric_columns.append(key)
-            except (ValueError, TypeError):
-                pass
+                output = run_batch(
+                    dataset_store, model_registry, dataset_ids, model_ids, params,
+                    workers=app.config['BATCH_WORKERS']
+                )
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            response.update({'results': output['results'], 'computeSeconds': output['computeSeconds']})
+            with phase('serialize'):
+                return jsonify(response)
         
-        for column in numeric_columns:
-            values = []
-            for row in data:
-                try:
-                    values.append(float(row[column]))
-                except (ValueError, TypeError):
-                    pass
-            
-            if values:
-                results['summary'][column] = {
-                    'mean': np.mean(values),
-                    'min': np.min(values),
-                    'max': np.max(values),
-                    'count': len(values)
-                }
+        job = job_manager.submit(
+            batch_worker, dataset_ids, model_ids, params, app.config['BATCH_WORKERS'],
+            on_success=lambda output: metrics.record_phases(output.get('phases', {}), 'analytics_batch_job'),
+            datasetIds=dataset_ids, modelIds=model_ids, analysisType='batch'
+        )
+        response.update({
+            'jobId': job['id'],
+            'status': job['status'],
+            'statusUrl': f"/api/analytics/{job['id']}"
+        })
+        return jsonify(response), 202
+    except Exception as e:
+        logger.error(f"Error performing batch analytics: {e}")
+        return jsonify({'error': 'Failed to perform batch analytics'}), 500
+
+@app.route('/api/analytics/<job_id>', methods=['GET'])
+def get_analytics_job(job_id):
+    try:
+        job = job_manager.get(job_id, include_result=request.args.get('result', '1') != '0')
+        if job is None:
+            return jsonify({'error': 'Job not found'}), 404
+        if not isinstance(job.get('result'), dict):
+            return jsonify(job)
+        
+        try:
+            fmt = negotiate_format(request.args, request.accept_mimetypes)
+            encoding = negotiate_encoding(request.args, request.accept_encodings)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if fmt == 'arrow' and 'forecast' not in job['result']:
+            return jsonify({'error': 'Arrow output is only available for forecast results'}), 406
+        return analytics_response(job, ['result'], fmt, encoding)
+    except Exception as e:
+        logger.error(f"Error reading analytics job: {e}")
+        return jsonify({'error': 'Failed to read analytics job'}), 500
+
+@app.route('/api/analytics/<job_id>', methods=['DELETE'])
+def cancel_analytics_job(job_id):
+    try:
+        job = job_manager.cancel(job_id)
+        if job is None:
+            return jsonify({'error': 'Job not found'}), 404
+        if job['status'] != 'cancelled':
+            return jsonify({'error': f"Job already {job['status']}"}), 409
+        return jsonify({'message': 'Job cancelled', 'job': job})
+    except Exception as e:
+        logger.error(f"Error cancelling analytics job: {e}")
+        return jsonify({'error': 'Failed to cancel analytics job'}), 500
+
+# Live mode routes
+@app.route('/api/live/<stream_id>/rows', methods=['POST'])
+def append_live_rows(stream_id):
+    try:
+        data = request.json
+        rows = data.get('rows', [data]) if isinstance(data, dict) else data
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            return jsonify({'error': 'Expected a row object, a list of rows or {"rows": [...]}'}), 400
+        
+        try:
+            stream = live_streams.get(stream_id, create=True)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 429
+        return jsonify(stream.append(rows))
+    except Exception as e:
+        logger.error(f"Error appending live rows: {e}")
+        return jsonify({'error': 'Failed to append live rows'}), 500
+
+@app.route('/api/live/<stream_id>', methods=['GET'])
+def get_live_stream(stream_id):
+    stream = live_streams.get(stream_id)
+    if stream is None:
+        return jsonify({'error': 'Live stream not found'}), 404
+    return jsonify(stream.snapshot())
+
+@app.route('/api/live/<stream_id>', methods=['DELETE'])
+def delete_live_stream(stream_id):
+    if not live_streams.remove(stream_id):
+        return jsonify({'error': 'Live stream not found'}), 404
+    return jsonify({'message': 'Live stream deleted successfully'})
+
+@app.route('/api/live/<stream_id>/events', methods=['GET'])
+def live_stream_events(stream_id):
+    # Streams are only created by appending rows, so clients cannot open unbounded ones here
+    stream = live_streams.get(stream_id)
+    if stream is None:
+        return jsonify({'error': 'Live stream not found'}), 404
+    keepalive = app.config['LIVE_KEEPALIVE_SECONDS']
+    # ?maxEvents=N ends the stream after N updates (handy for scripts and tests)
+    max_events = request.args.get('maxEvents', type=int)
+    
+    def events():
+        snapshot = stream.snapshot()
+        sent = 0
+        yield f"event: metrics\ndata: {json.dumps(snapshot)}\n\n"
+        while max_events is None or sent < max_events:
+            version = snapshot['version']
+            snapshot = stream.wait(version, keepalive)
+            if snapshot['version'] == version:
+                yield ": keep-alive\n\n"
+                continue
+            sent += 1
+            yield f"event: metrics\nid: {snapshot['version']}\ndata: {json.dumps(snapshot)}\n\n"
     
-    return results
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
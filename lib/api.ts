@@ -23,9 +23,47 @@ export interface AnalyticsRequest {
   analysisType: string
 }
 
+export interface BatchAnalyticsRequest {
+  datasetIds: string[]
+  modelIds: string[]
+  horizon?: number
+  lookback?: number
+  groupBy?: string
+  metrics?: string[]
+}
+
+export interface DatasetQuery {
+  offset?: number
+  limit?: number
+  columns?: string[]
+  start?: string
+  end?: string
+  resample?: string
+  agg?: string[]
+  // 'columnar' returns data as { column: values[] }; 'records' (default) as row objects
+  format?: 'records' | 'columnar'
+}
+
+// Delay between polls of a queued analytics job
+const JOB_POLL_INTERVAL_MS = 500
+
 export class ApiClient {
   private baseUrl = '/api'
 
+  // Poll a job queued with 202 until it finishes; resolves to the job record with its result
+  private async waitForJob(statusUrl: string): Promise<any> {
+    while (true) {
+      const response = await fetch(statusUrl)
+      const job = await response.json()
+      if (!response.ok) throw new Error(job.error)
+      if (job.status === 'completed') return job
+      if (job.status === 'failed' || job.status === 'cancelled') {
+        throw new Error(job.error || `Analytics job ${job.status}`)
+      }
+      await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL_MS))
+    }
+  }
+
   async getDatasets(): Promise<Dataset[]> {
     const response = await fetch(`${this.baseUrl}/datasets`)
     const data = await response.json()
@@ -55,8 +93,14 @@ export class ApiClient {
     }
   }
 
-  async getDataset(id: string): Promise<any> {
-    const response = await fetch(`${this.baseUrl}/datasets/${id}`)
+  async getDataset(id: string, query: DatasetQuery = {}): Promise<any> {
+    const params = new URLSearchParams()
+    Object.entries(query).forEach(([key, value]) => {
+      if (value === undefined) return
+      params.set(key, Array.isArray(value) ? value.join(',') : String(value))
+    })
+    const search = params.toString() ? `?${params.toString()}` : ''
+    const response = await fetch(`${this.baseUrl}/datasets/${id}${search}`)
     const data = await response.json()
     if (!response.ok) throw new Error(data.error)
     return data
@@ -114,6 +158,30 @@ export class ApiClient {
     
     const data = await response.json()
     if (!response.ok) throw new Error(data.error)
+    // Analyses are queued as jobs (202); wait for the results so callers get the same shape as before
+    if (response.status === 202) {
+      const job = await this.waitForJob(data.statusUrl)
+      return { ...data, status: job.status, results: job.result }
+    }
+    return data
+  }
+
+  async runBatchAnalytics(request: BatchAnalyticsRequest): Promise<any> {
+    const response = await fetch(`${this.baseUrl}/analytics/batch`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json'
+      },
+      body: JSON.stringify(request)
+    })
+    
+    const data = await response.json()
+    if (!response.ok) throw new Error(data.error)
+    // Larger batches are queued as jobs (202)
+    if (response.status === 202) {
+      const job = await this.waitForJob(data.statusUrl)
+      return { ...data, status: job.status, results: job.result }
+    }
     return data
   }
 }
@@ -0,0 +1,325 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import resource
+import logging
+import tempfile
+import threading
+import importlib.util
+from datetime import datetime
+
+import numpy as np
+
+# Benchmark the Flask backend through its test client.
+#
+# Generated OEE datasets of each requested size are uploaded, read and analysed, and
+# the model catalog is grown to each requested size and listed. Every scenario records
+# latency percentiles, throughput, response bytes and how far RSS peaked above its value
+# when the scenario started; results are written as JSON and optionally compared against
+# a stored baseline (exit code 1 on regression).
+#
+#   python scripts/benchmark.py --sizes 10000,100000 --catalog-sizes 10,1000 --output bench.json
+#   python scripts/benchmark.py --baseline bench.json          # gate on the stored run
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PERCENTILES = [50, 90, 95, 99]
+MACHINES = 10
+
+# Metrics compared against the baseline (higher is worse for all of them)
+GATED_METRICS = ['p50Ms', 'p95Ms', 'rssPeakDeltaMB']
+# How often current RSS is sampled while a scenario runs
+RSS_SAMPLE_SECONDS = 0.005
+
+
+def load_generator():
+    """Import scripts/generate-sample-data.py (not importable by name because of the dashes)"""
+    path = os.path.join(REPO_ROOT, 'scripts', 'generate-sample-data.py')
+    spec = importlib.util.spec_from_file_location('generate_sample_data', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def peak_rss_mb():
+    """Peak RSS of the whole process so far (it never goes down)"""
+    # ru_maxrss is KB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def current_rss_mb():
+    """Current RSS, or None where /proc is not available"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+
+class RssSampler:
+    """Highest current RSS seen while a scenario runs, sampled on a background thread"""
+
+    def __init__(self, interval=RSS_SAMPLE_SECONDS):
+        self.interval = interval
+        self.start = current_rss_mb()
+        self.peak = self.start
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, current_rss_mb())
+
+    def __enter__(self):
+        if self.start is not None:
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self.start is not None:
+            self._stop.set()
+            self._thread.join()
+            self.end = current_rss_mb()
+            self.peak = max(self.peak, self.end)
+        return False
+
+
+def summarize(samples, rows=None):
+    """Latency percentiles, throughput and bytes for a list of (seconds, bytes) samples"""
+    seconds = np.array([s for s, _ in samples])
+    sizes = np.array([b for _, b in samples])
+    total = seconds.sum()
+    stats = {
+        'requests': len(samples),
+        'meanMs': float(seconds.mean() * 1000),
+        'minMs': float(seconds.min() * 1000),
+        'maxMs': float(seconds.max() * 1000),
+        'requestsPerSecond': float(len(samples) / total) if total > 0 else None,
+        'responseBytes': int(sizes.mean()),
+        'megabytesPerSecond': float(sizes.sum() / total / 1e6) if total > 0 else None
+    }
+    for p, value in zip(PERCENTILES, np.percentile(seconds, PERCENTILES)):
+        stats[f"p{p}Ms"] = float(value * 1000)
+    if rows:
+        stats['rowsPerSecond'] = float(rows * len(samples) / total) if total > 0 else None
+    return stats
+
+
+class Bench:
+    def __init__(self, app_module, repeat):
+        self.app_module = app_module
+        self.client = app_module.app.test_client()
+        self.repeat = repeat
+        self.results = {}
+
+    def run(self, name, call, rows=None, before=None, repeat=None):
+        """Time `call` (returning a response) `repeat` times; `before` runs untimed first"""
+        samples = []
+        with RssSampler() as rss:
+            for _ in range(repeat or self.repeat):
+                if before:
+                    before()
+                started = time.perf_counter()
+                response = call()
+                body = response.get_data()  # drains streamed responses inside the timing
+                elapsed = time.perf_counter() - started
+                if response.status_code >= 400:
+                    raise RuntimeError(f"{name}: HTTP {response.status_code} {body[:200]!r}")
+                samples.append((elapsed, len(body)))
+        stats = summarize(samples, rows)
+        # Memory this scenario needed on top of what the process already held when it started
+        if rss.start is not None:
+            stats['rssPeakDeltaMB'] = rss.peak - rss.start
+            stats['rssRetainedMB'] = rss.end - rss.start
+        stats['processPeakRssMB'] = peak_rss_mb()
+        self.results[name] = stats
+        print(f"  {name:<40} p50 {stats['p50Ms']:10.1f} ms   p95 {stats['p95Ms']:10.1f} ms   "
+              f"{stats['responseBytes']:>12} B   rss +{stats.get('rssPeakDeltaMB', 0):8.1f} MB")
+        return stats
+
+    # Datasets
+
+    def datasets(self, size, generator, data_folder):
+        path = os.path.join(data_folder, f"bench_{size}.csv")
+        if not os.path.exists(path):
+            periods = -(-size // MACHINES)
+            generator.generate(path, machines=MACHINES, freq='h', periods=periods, seed=size)
+        file_size = os.path.getsize(path)
+        rows = -(-size // MACHINES) * MACHINES
+        dataset_id = f"bench_{size}.csv"
+        app_module = self.app_module
+        print(f"dataset {dataset_id}: {rows} rows, {file_size / 1e6:.1f} MB")
+
+        def stream_upload():
+            with open(path, 'rb') as f:
+                return self.client.post(f"/api/datasets/stream?filename={dataset_id}", data=f,
+                                        content_type='text/csv')
+        self.run(f"upload_stream@{size}", stream_upload, rows)
+
+        if file_size <= app_module.app.config['MAX_CONTENT_LENGTH']:
+            def upload():
+                with open(path, 'rb') as f:
+                    return self.client.post('/api/datasets', data={'file': (f, dataset_id)},
+                                            content_type='multipart/form-data')
+            self.run(f"upload@{size}", upload, rows)
+
+        page = lambda: self.client.get(f"/api/datasets/{dataset_id}?limit=1000")
+        self.run(f"read_page@{size}", page)
+        self.run(f"read_page_cold@{size}", page,
+                 before=lambda: app_module.dataset_store.frames.discard(dataset_id))
+        self.run(f"read_full@{size}", lambda: self.client.get(f"/api/datasets/{dataset_id}"), rows)
+        self.run(f"read_resample@{size}",
+                 lambda: self.client.get(f"/api/datasets/{dataset_id}?resample=D&agg=mean"), rows)
+        self.run(f"rollups@{size}",
+                 lambda: self.client.get(f"/api/datasets/{dataset_id}/rollups?granularity=day"))
+        return dataset_id, rows
+
+    def analytics(self, size, dataset_id, rows, analyses):
+        app_module = self.app_module
+        for analysis_type in analyses:
+            payload = {'datasetId': dataset_id, 'modelId': 'sarima_model', 'analysisType': analysis_type, 'wait': True}
+            call = lambda: self.client.post('/api/analytics', json=payload)
+            self.run(f"analytics_{analysis_type}@{size}", call, rows,
+                     before=lambda: app_module.result_cache.invalidate(dataset_id=dataset_id))
+            self.run(f"analytics_{analysis_type}_cached@{size}", call, rows)
+
+    # Catalog
+
+    def catalog(self, size, model_folder):
+        """Grow the model catalog to `size` entries, then time listings and an upload"""
+        catalog = self.app_module.catalog
+        existing = catalog.list_models({})[1]
+        for i in range(existing, size):
+            model_id = f"bench_model_{i:06d}.json"
+            model_path = os.path.join(model_folder, model_id)
+            with open(model_path, 'w') as f:
+                json.dump({'coefficients': [0.1, 0.2]}, f)
+            metadata = {'description': f"Benchmark model {i}", 'accuracy': (i % 100) / 100, 'version': str(i % 3 + 1)}
+            catalog.upsert_model(model_id, model_path, metadata)
+        print(f"catalog: {size} models")
+
+        self.run(f"list_models@{size}", lambda: self.client.get('/api/models'))
+        self.run(f"list_models_page@{size}",
+                 lambda: self.client.get('/api/models?sort=accuracy&order=desc&limit=50'))
+        self.run(f"search_models@{size}", lambda: self.client.get('/api/models?q=model_0001&limit=50'))
+
+        etag = self.client.get('/api/models').headers['ETag']
+        self.run(f"list_models_not_modified@{size}",
+                 lambda: self.client.get('/api/models', headers={'If-None-Match': etag}))
+
+        def upload():
+            with open(os.path.join(model_folder, 'bench_model_000000.json'), 'rb') as f:
+                return self.client.post('/api/models', data={
+                    'file': (f, 'bench_upload.json'),
+                    'metadata': json.dumps({'description': 'upload benchmark', 'accuracy': 0.5})
+                }, content_type='multipart/form-data')
+        self.run(f"upload_model@{size}", upload)
+        self.client.delete('/api/models/bench_upload.json')
+
+
+def compare(results, baseline, tolerance, min_delta_ms, min_delta_mb=0):
+    """Regressions of the gated metrics beyond the tolerance, as printable lines"""
+    regressions = []
+    for name, stats in sorted(results.items()):
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for metric in GATED_METRICS:
+            current, previous = stats.get(metric), base.get(metric)
+            if current is None or previous is None:
+                continue
+            if metric.endswith('Ms') and current - previous < min_delta_ms:
+                continue
+            if metric.endswith('MB') and current - previous < min_delta_mb:
+                continue
+            if current > previous * (1 + tolerance):
+                regressions.append(f"{name} {metric}: {previous:.1f} -> {current:.1f} "
+                                   f"(+{(current / previous - 1) * 100 if previous else float('inf'):.0f}%)")
+    return regressions
+
+
+def parse_sizes(value):
+    return [int(float(v)) for v in value.split(',') if v]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the OEE360 Flask backend')
+    parser.add_argument('--sizes', default='10000,100000', help='dataset rows, e.g. 10000,1e6,1e7')
+    parser.add_argument('--catalog-sizes', default='10,1000', help='model catalog sizes, e.g. 10,1000,10000')
+    parser.add_argument('--analyses', default='full,forecast', help='analysisType values to time')
+    parser.add_argument('--repeat', type=int, default=5, help='requests per scenario')
+    parser.add_argument('--output', default='benchmark-results.json')
+    parser.add_argument('--baseline', help='earlier results file to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative slowdown')
+    parser.add_argument('--min-delta-ms', type=float, default=5.0,
+                        help='latency increases smaller than this never count as regressions')
+    parser.add_argument('--min-delta-mb', type=float, default=16.0,
+                        help='memory increases smaller than this never count as regressions')
+    parser.add_argument('--workdir', help='where data is generated (default: a temporary folder)')
+    parser.add_argument('--keep', action='store_true', help='keep the temporary working folder')
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output)
+    baseline_path = os.path.abspath(args.baseline) if args.baseline else None
+    workdir = os.path.abspath(args.workdir) if args.workdir else tempfile.mkdtemp(prefix='oee360-bench-')
+    generated = os.path.join(workdir, 'generated')
+    os.makedirs(generated, exist_ok=True)
+
+    # app.py places its data folders under the working directory at import time
+    os.chdir(workdir)
+    sys.path.insert(0, REPO_ROOT)
+    import app as app_module
+    logging.getLogger().setLevel(logging.WARNING)
+
+    generator = load_generator()
+    bench = Bench(app_module, args.repeat)
+    analyses = [a for a in args.analyses.split(',') if a]
+    started = time.perf_counter()
+    try:
+        for size in sorted(parse_sizes(args.sizes)):
+            dataset_id, rows = bench.datasets(size, generator, generated)
+            bench.analytics(size, dataset_id, rows, analyses)
+        for size in sorted(parse_sizes(args.catalog_sizes)):
+            bench.catalog(size, app_module.app.config['MODEL_FOLDER'])
+    finally:
+        app_module.job_manager.shutdown()
+        if not args.workdir and not args.keep:
+            os.chdir(REPO_ROOT)
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpuCount': os.cpu_count(),
+            'repeat': args.repeat,
+            'sizes': parse_sizes(args.sizes),
+            'catalogSizes': parse_sizes(args.catalog_sizes),
+            'totalSeconds': time.perf_counter() - started
+        },
+        'results': bench.results
+    }
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+    if baseline_path:
+        with open(baseline_path, 'r') as f:
+            baseline = json.load(f)['results']
+        regressions = compare(bench.results, baseline, args.tolerance, args.min_delta_ms, args.min_delta_mb)
+        if regressions:
+            print(f"{len(regressions)} regression(s) against {baseline_path}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"No regressions against {baseline_path}")
+
+
+if __name__ == "__main__":
+    main()
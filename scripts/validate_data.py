@@ -1,69 +1,76 @@
-import pandas as pd
+import argparse
+import json
 import sys
 import os
 
-def validate_csv_file(filepath):
-    """Validate CSV file format for OEE dashboard"""
-    required_columns = [
-        'timestamp', 'OEE', 'availability', 'performance', 'quality',
-        'temp', 'humidity', 'machine_speed', 'vibration', 'pressure',
-        'power_consumption', 'hour_of_day', 'day_of_week', 'month'
-    ]
-    
-    try:
-        # Load CSV
-        df = pd.read_csv(filepath)
-        print(f"📊 Validating: {os.path.basename(filepath)}")
-        print(f"   Rows: {len(df)}")
-        print(f"   Columns: {len(df.columns)}")
-        
-        # Check required columns
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        if missing_columns:
-            print(f"❌ Missing columns: {missing_columns}")
-            return False
-        
-        # Check data types
-        try:
-            pd.to_datetime(df['timestamp'])
-            print("✅ Timestamp format: OK")
-        except:
-            print("❌ Timestamp format: Invalid")
-            return False
-        
-        # Check numeric ranges
-        numeric_checks = [
-            ('OEE', 0, 1),
-            ('availability', 0, 1),
-            ('performance', 0, 1),
-            ('quality', 0, 1),
-            ('temp', -50, 100),
-            ('humidity', 0, 100)
-        ]
-        
-        for col, min_val, max_val in numeric_checks:
-            if df[col].min() < min_val or df[col].max() > max_val:
-                print(f"⚠️  {col}: Values outside expected range [{min_val}, {max_val}]")
-        
-        print("✅ Validation complete")
-        return True
-        
-    except Exception as e:
-        print(f"❌ Error: {e}")
-        return False
+# Run from anywhere: the validation engine lives in the backend's utils package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from utils.validator import DEFAULT_CHUNK_ROWS, validate_file
+
+
+def print_report(filepath, report):
+    """Human-readable summary of a validation report"""
+    print(f"📊 Validating: {os.path.basename(filepath)}")
+    print(f"   Rows: {report['rows']}")
+    print(f"   Columns: {len(report['columns'])}")
+
+    if report['missingColumns']:
+        print(f"❌ Missing columns: {report['missingColumns']}")
+
+    for column, stats in report['columns'].items():
+        if stats['invalid']:
+            print(f"❌ {column}: {stats['invalid']} invalid values (rows {stats['invalidRows']})")
+        if stats['nulls']:
+            print(f"⚠️  {column}: {stats['nulls']} missing values")
+        if stats.get('outOfRange'):
+            print(f"⚠️  {column}: {stats['outOfRange']} values outside expected range "
+                  f"{stats['expectedRange']} (rows {stats['outOfRangeRows']})")
+
+    timestamps = report['timestamps']
+    if 'timestamp' in report['columns'] and not report['columns']['timestamp']['invalid']:
+        print("✅ Timestamp format: OK")
+    if timestamps['expectedIntervalSeconds']:
+        print(f"   Interval: {timestamps['expectedIntervalSeconds']:g}s across {timestamps['series']} series")
+    for field, rows, label in (('duplicates', 'duplicateRows', 'duplicate timestamps'),
+                               ('outOfOrder', 'outOfOrderRows', 'out-of-order timestamps'),
+                               ('gaps', 'gapRows', 'gaps')):
+        if timestamps[field]:
+            print(f"⚠️  {timestamps[field]} {label} (rows {timestamps[rows]})")
+
+    print("✅ Validation complete" if report['valid'] else "❌ Validation failed")
+
 
 def main():
-    if len(sys.argv) != 2:
-        print("Usage: python validate_data.py <csv_file>")
+    parser = argparse.ArgumentParser(description='Validate a CSV/JSON dataset for the OEE dashboard')
+    parser.add_argument('file', help='dataset to validate')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: one per core)')
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS, help='rows parsed at once per worker')
+    parser.add_argument('--interval', default=None,
+                        help="expected sampling interval, e.g. 1h or 15min (default: inferred from the data)")
+    parser.add_argument('--json', action='store_true', help='print the full report as JSON')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.file):
+        print(f"❌ File not found: {args.file}")
         sys.exit(1)
-    
-    filepath = sys.argv[1]
-    if not os.path.exists(filepath):
-        print(f"❌ File not found: {filepath}")
+
+    try:
+        interval = pd.Timedelta(args.interval).value if args.interval else None
+        report = validate_file(args.file, workers=args.workers, chunk_rows=args.chunk_rows, interval=interval)
+    except (ValueError, pd.errors.ParserError) as e:
+        print(f"❌ Error: {e}")
         sys.exit(1)
-    
-    is_valid = validate_csv_file(filepath)
-    sys.exit(0 if is_valid else 1)
+
+    report = report.to_dict()
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(args.file, report)
+    sys.exit(0 if report['valid'] else 1)
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,191 @@
+import warnings
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from utils.dataset_store import TIMESTAMP_COLUMN
+from utils.forecasting import run_forecast
+
+OEE_COMPONENTS = ['availability', 'performance', 'quality']
+OEE_METRICS = ['OEE'] + OEE_COMPONENTS
+PERCENTILES = [5, 25, 50, 75, 95]
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+
+def _number(value):
+    """Plain Python float for JSON, None for NaN/inf"""
+    value = float(value)
+    return value if np.isfinite(value) else None
+
+
+def numeric_columns(df):
+    return df.select_dtypes('number').columns.tolist()
+
+
+def summarize(df):
+    """Per-column statistics computed column-wise over one float64 matrix"""
+    columns = numeric_columns(df)
+    if not columns or len(df) == 0:
+        return {}
+
+    values = df[columns].to_numpy(dtype=np.float64)
+    counts = np.count_nonzero(~np.isnan(values), axis=0)
+    with warnings.catch_warnings():
+        # All-NaN columns are reported with count 0 and dropped below
+        warnings.simplefilter('ignore', RuntimeWarning)
+        means = np.nanmean(values, axis=0)
+        stds = np.nanstd(values, axis=0, ddof=1)
+        mins = np.nanmin(values, axis=0)
+        maxs = np.nanmax(values, axis=0)
+        percentiles = np.nanpercentile(values, PERCENTILES, axis=0)
+
+    summary = {}
+    for i, column in enumerate(columns):
+        if counts[i] == 0:
+            continue
+        summary[str(column)] = {
+            'mean': _number(means[i]),
+            'min': _number(mins[i]),
+            'max': _number(maxs[i]),
+            'count': int(counts[i]),
+            'std': _number(stds[i]) if counts[i] > 1 else None,
+            'percentiles': {f"p{p}": _number(percentiles[j, i]) for j, p in enumerate(PERCENTILES)},
+            'nulls': int(len(df) - counts[i])
+        }
+    return summary
+
+
+def null_counts(df):
+    return {str(column): int(count) for column, count in df.isna().sum().items()}
+
+
+def oee_decomposition(df):
+    """Break OEE down into availability x performance x quality and their losses"""
+    present = [c for c in OEE_COMPONENTS if c in df.columns]
+    if len(present) < len(OEE_COMPONENTS):
+        return {'available': False, 'missingColumns': [c for c in OEE_COMPONENTS if c not in present]}
+
+    components = df[OEE_COMPONENTS].to_numpy(dtype=np.float64)
+    computed = components.prod(axis=1)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        component_means = np.nanmean(components, axis=0)
+        computed_mean = np.nanmean(computed)
+
+    # Share of the total OEE loss attributable to each factor, using
+    # -log(OEE) = -log(A) - log(P) - log(Q) on the factor means
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_losses = -np.log(component_means)
+    total_log_loss = log_losses.sum()
+
+    result = {
+        'available': True,
+        'oee': _number(computed_mean),
+        'components': {},
+    }
+    for i, name in enumerate(OEE_COMPONENTS):
+        share = log_losses[i] / total_log_loss if total_log_loss > 0 else 0.0
+        result['components'][name] = {
+            'mean': _number(component_means[i]),
+            'loss': _number(1 - component_means[i]),
+            'lossShare': _number(share)
+        }
+
+    if 'OEE' in df.columns:
+        reported = df['OEE'].to_numpy(dtype=np.float64)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            result['reportedOee'] = _number(np.nanmean(reported))
+            result['meanAbsDeviation'] = _number(np.nanmean(np.abs(reported - computed)))
+    return result
+
+
+def _group_keys(df):
+    """Named group-by keys available in this frame"""
+    keys = {}
+    if 'shift' in df.columns:
+        keys['shift'] = df['shift']
+    if TIMESTAMP_COLUMN in df.columns and pd.api.types.is_datetime64_any_dtype(df[TIMESTAMP_COLUMN]):
+        keys['hourOfDay'] = df[TIMESTAMP_COLUMN].dt.hour
+        keys['dayOfWeek'] = df[TIMESTAMP_COLUMN].dt.dayofweek.map(dict(enumerate(DAY_NAMES)))
+    else:
+        if 'hour_of_day' in df.columns:
+            keys['hourOfDay'] = df['hour_of_day']
+        if 'day_of_week' in df.columns:
+            keys['dayOfWeek'] = df['day_of_week']
+    return keys
+
+
+def group_breakdown(df):
+    """Mean metrics and row counts by shift, hour of day and day of week"""
+    metrics = [c for c in OEE_METRICS if c in df.columns] or numeric_columns(df)
+    if not metrics:
+        return {}
+
+    breakdown = {}
+    for name, key in _group_keys(df).items():
+        grouped = df[metrics].groupby(key.rename(name), observed=True, sort=True)
+        means = grouped.mean()
+        counts = grouped.size()
+        groups = {}
+        for label, row in means.iterrows():
+            groups[str(label)] = {
+                'count': int(counts[label]),
+                **{str(metric): _number(row[metric]) for metric in metrics}
+            }
+        breakdown[name] = groups
+    return breakdown
+
+
+def _basic(df, options):
+    return {'summary': summarize(df), 'nulls': null_counts(df)}
+
+
+def _oee(df, options):
+    return {**_basic(df, options), 'oee': oee_decomposition(df)}
+
+
+def _groups(df, options):
+    return {**_basic(df, options), 'groups': group_breakdown(df)}
+
+
+def _full(df, options):
+    return {**_basic(df, options), 'oee': oee_decomposition(df), 'groups': group_breakdown(df)}
+
+
+def _forecast(df, options):
+    return {
+        'summary': summarize(df),
+        'forecast': run_forecast(df, options['params'], options['modelId'], options['model'])
+    }
+
+
+# analysisType -> analysis function
+ANALYSES = {
+    'basic': _basic,
+    'oee': _oee,
+    'groupby': _groups,
+    'full': _full,
+    'forecast': _forecast,
+}
+
+
+def run_analysis(df, analysis_type=None, params=None, model_id=None, model=None):
+    """Run the analysis selected by analysisType on a typed dataset frame
+
+    params carries request options such as horizon and lookback; model is the loaded
+    model object (if any) used by model-driven analyses like forecasting.
+    """
+    analysis_type = analysis_type or 'basic'
+    if analysis_type not in ANALYSES:
+        raise ValueError(f"Unknown analysis type '{analysis_type}'. Expected one of {sorted(ANALYSES)}")
+
+    results = {
+        'rowCount': len(df),
+        'timestamp': datetime.now().isoformat(),
+        'analysisType': analysis_type,
+    }
+    options = {'params': params or {}, 'modelId': model_id, 'model': model}
+    results.update(ANALYSES[analysis_type](df, options))
+    return results
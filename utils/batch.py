@@ -0,0 +1,112 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from utils.analytics import oee_decomposition
+from utils.forecasting import prepare_forecast, run_forecast
+from utils.tasks import load_model, worker_stores
+from utils.metrics import phase
+
+
+def _evaluate(df, prepared, model_id, model, params):
+    """Forecast backtest of one model on one dataset's (shared, read-only) series"""
+    started = time.perf_counter()
+    try:
+        # jobs=1: the batch already runs cells side by side, so no nested process pool per cell
+        forecast = run_forecast(df, {**params, 'jobs': 1}, model_id, model, prepared)
+    except ValueError as e:
+        return {'error': str(e), 'seconds': time.perf_counter() - started}
+    backtest = forecast['backtest'] or {}
+    return {
+        'method': forecast['method'],
+        'series': len(forecast['series']),
+        'mae': backtest.get('mae'),
+        'rmse': backtest.get('rmse'),
+        'seconds': time.perf_counter() - started
+    }
+
+
+def _load_models(model_registry, model_ids):
+    """model id -> (model, summary, error); a model that fails to load only fails its cells"""
+    models = {}
+    for model_id in model_ids:
+        try:
+            model, model_info = load_model(model_registry, model_id)
+            models[model_id] = (model, model_info, None)
+        except Exception as e:
+            models[model_id] = (None, {'id': model_id, 'loaded': False}, f"Model could not be loaded: {e}")
+    return models
+
+
+def _prepare(df, params):
+    """OEE summary plus the forecast series of one dataset, or the error preparing them"""
+    oee = oee_decomposition(df)
+    try:
+        return oee, prepare_forecast(df, params), None
+    except ValueError as e:
+        return oee, None, str(e)
+
+
+def run_batch(dataset_store, model_registry, dataset_ids, model_ids, params=None, workers=None):
+    """Compare every model on every dataset
+
+    Each dataset and model is loaded once, and each dataset's series are extracted once and
+    shared by all of its cells, which run on a thread pool (the forecasting work is NumPy
+    and releases the GIL). results holds one row per dataset with its OEE summary, one cell
+    per model and the lowest-error model; failures are reported in the affected cells.
+    """
+    params = params or {}
+    started_at = datetime.now().isoformat()
+    started = time.perf_counter()
+
+    with phase('load') as load:
+        frames = {dataset_id: dataset_store.load(dataset_id) for dataset_id in dataset_ids}
+        models = _load_models(model_registry, model_ids)
+
+    with phase('compute') as compute:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            prepared = {dataset_id: pool.submit(_prepare, df, params) for dataset_id, df in frames.items()}
+            prepared = {dataset_id: future.result() for dataset_id, future in prepared.items()}
+            cells = {}
+            for dataset_id in dataset_ids:
+                dataset_error = prepared[dataset_id][2]
+                for model_id in model_ids:
+                    model, _, model_error = models[model_id]
+                    error = dataset_error or model_error
+                    if error:
+                        cells[(dataset_id, model_id)] = {'error': error}
+                    else:
+                        cells[(dataset_id, model_id)] = pool.submit(
+                            _evaluate, frames[dataset_id], prepared[dataset_id][1], model_id, model, params
+                        )
+            cells = {pair: cell if isinstance(cell, dict) else cell.result() for pair, cell in cells.items()}
+
+    rows = []
+    for dataset_id in dataset_ids:
+        scored = [(cells[(dataset_id, m)]['mae'], m) for m in model_ids if cells[(dataset_id, m)].get('mae') is not None]
+        rows.append({
+            'datasetId': dataset_id,
+            'rowCount': len(frames[dataset_id]),
+            'oee': prepared[dataset_id][0],
+            'bestModel': min(scored)[1] if scored else None,
+            'cells': [{'modelId': model_id, **cells[(dataset_id, model_id)]} for model_id in model_ids]
+        })
+
+    return {
+        'results': {
+            'datasets': list(dataset_ids),
+            'models': [models[model_id][1] for model_id in model_ids],
+            'metric': 'mae',
+            'rows': rows
+        },
+        'startedAt': started_at,
+        'finishedAt': datetime.now().isoformat(),
+        'computeSeconds': time.perf_counter() - started,
+        'phases': {'load': load.seconds, 'compute': compute.seconds}
+    }
+
+
+def batch_worker(dataset_ids, model_ids, params=None, workers=None):
+    """Process-pool entry point for a batch queued as an analytics job"""
+    dataset_store, model_registry = worker_stores()
+    return run_batch(dataset_store, model_registry, dataset_ids, model_ids, params, workers)
@@ -0,0 +1,296 @@
+import os
+import json
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime
+
+from utils.model_loader import METADATA_SUFFIX
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS datasets (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    type TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    last_modified TEXT NOT NULL,
+    sha256 TEXT,
+    rows INTEGER,
+    schema TEXT
+);
+CREATE TABLE IF NOT EXISTS models (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    type TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    last_modified TEXT NOT NULL,
+    sha256 TEXT,
+    description TEXT NOT NULL DEFAULT '',
+    accuracy REAL,
+    version TEXT NOT NULL DEFAULT '1.0',
+    metadata TEXT
+);
+CREATE INDEX IF NOT EXISTS datasets_last_modified ON datasets (last_modified);
+CREATE INDEX IF NOT EXISTS models_last_modified ON models (last_modified);
+CREATE INDEX IF NOT EXISTS models_accuracy ON models (accuracy);
+CREATE TABLE IF NOT EXISTS generations (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+# Sort keys accepted by the listing endpoints -> column
+SORT_COLUMNS = {
+    'name': 'name',
+    'size': 'size',
+    'lastModified': 'last_modified',
+    'type': 'type',
+    'accuracy': 'accuracy',
+    'version': 'version'
+}
+
+DATASET_EXTENSIONS = ['csv', 'json']
+
+
+def _extension(filename):
+    return filename.rsplit('.', 1)[1] if '.' in filename else 'unknown'
+
+
+def _stat_fields(file_path):
+    stats = os.stat(file_path)
+    return {
+        'size': stats.st_size,
+        'mtime_ns': stats.st_mtime_ns,
+        'last_modified': datetime.fromtimestamp(stats.st_mtime).isoformat()
+    }
+
+
+class Catalog:
+    """SQLite index of uploaded datasets and models
+
+    Uploads and deletes update it in a transaction; listings are indexed queries instead
+    of directory scans. Each table has a generation counter that changes with every write,
+    which makes a cheap ETag for listing responses.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def generation(self, table):
+        row = self._connect().execute('SELECT value FROM generations WHERE name = ?', (table,)).fetchone()
+        return row['value'] if row else 0
+
+    def etag(self, table, args):
+        """ETag for a listing: changes when the table or the query changes"""
+        query = '&'.join(f"{k}={v}" for k, v in sorted(args.items()))
+        material = f"{table}:{self.generation(table)}:{query}"
+        return hashlib.sha1(material.encode('utf-8')).hexdigest()
+
+    def _bump(self, conn, table):
+        conn.execute(
+            'INSERT INTO generations (name, value) VALUES (?, 1) '
+            'ON CONFLICT(name) DO UPDATE SET value = value + 1',
+            (table,)
+        )
+
+    # Datasets
+
+    def upsert_dataset(self, dataset_id, file_path, sha256=None, rows=None, schema=None):
+        record = {
+            'id': dataset_id,
+            'name': dataset_id,
+            'type': _extension(dataset_id),
+            'sha256': sha256,
+            'rows': rows,
+            'schema': json.dumps(schema) if schema is not None else None,
+            **_stat_fields(file_path)
+        }
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO datasets (id, name, type, size, mtime_ns, last_modified, sha256, rows, schema) '
+                'VALUES (:id, :name, :type, :size, :mtime_ns, :last_modified, :sha256, :rows, :schema)',
+                record
+            )
+            self._bump(conn, 'datasets')
+
+    def append_dataset(self, dataset_id, file_path, added_rows):
+        """Record rows appended to a dataset without rehashing or re-reading it
+
+        Size, mtime and the row count move forward and the schema is kept; the stored
+        sha256 no longer describes the file, so it is cleared until the next upload.
+        """
+        with self._connect() as conn:
+            conn.execute(
+                'UPDATE datasets SET size = :size, mtime_ns = :mtime_ns, last_modified = :last_modified, '
+                'rows = rows + :added_rows, sha256 = NULL WHERE id = :id',
+                {'id': dataset_id, 'added_rows': added_rows, **_stat_fields(file_path)}
+            )
+            self._bump(conn, 'datasets')
+
+    def delete_dataset(self, dataset_id):
+        with self._connect() as conn:
+            conn.execute('DELETE FROM datasets WHERE id = ?', (dataset_id,))
+            self._bump(conn, 'datasets')
+
+    def list_datasets(self, args):
+        filters, params = [], []
+        if args.get('type'):
+            filters.append('type = ?')
+            params.append(args['type'])
+        if args.get('q'):
+            filters.append('name LIKE ?')
+            params.append(f"%{args['q']}%")
+        rows, total = self._list('datasets', filters, params, args)
+        return [self._dataset(row) for row in rows], total
+
+    @staticmethod
+    def _dataset(row):
+        return {
+            'id': row['id'],
+            'name': row['name'],
+            'size': row['size'],
+            'lastModified': row['last_modified'],
+            'type': row['type'],
+            'sha256': row['sha256'],
+            'rows': row['rows'],
+            'schema': json.loads(row['schema']) if row['schema'] else None
+        }
+
+    # Models
+
+    def upsert_model(self, model_id, file_path, metadata=None, sha256=None):
+        metadata = metadata or {}
+        record = {
+            'id': model_id,
+            'name': model_id,
+            'type': _extension(model_id),
+            'sha256': sha256,
+            'description': metadata.get('description', ''),
+            'accuracy': metadata.get('accuracy', None),
+            'version': str(metadata.get('version', '1.0')),
+            'metadata': json.dumps(metadata),
+            **_stat_fields(file_path)
+        }
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO models '
+                '(id, name, type, size, mtime_ns, last_modified, sha256, description, accuracy, version, metadata) '
+                'VALUES (:id, :name, :type, :size, :mtime_ns, :last_modified, :sha256, :description, :accuracy, '
+                ':version, :metadata)',
+                record
+            )
+            self._bump(conn, 'models')
+
+    def delete_model(self, model_id):
+        with self._connect() as conn:
+            conn.execute('DELETE FROM models WHERE id = ?', (model_id,))
+            self._bump(conn, 'models')
+
+    def list_models(self, args):
+        filters, params = [], []
+        if args.get('type'):
+            filters.append('type = ?')
+            params.append(args['type'])
+        if args.get('q'):
+            filters.append('(name LIKE ? OR description LIKE ?)')
+            params.extend([f"%{args['q']}%"] * 2)
+        if args.get('version'):
+            filters.append('version = ?')
+            params.append(args['version'])
+        if args.get('minAccuracy'):
+            filters.append('accuracy >= ?')
+            params.append(float(args['minAccuracy']))
+        rows, total = self._list('models', filters, params, args)
+        return [self._model(row) for row in rows], total
+
+    @staticmethod
+    def _model(row):
+        return {
+            'id': row['id'],
+            'name': row['name'],
+            'size': row['size'],
+            'lastModified': row['last_modified'],
+            'type': row['type'],
+            'description': row['description'],
+            'accuracy': row['accuracy'],
+            'version': row['version'],
+            'sha256': row['sha256']
+        }
+
+    def _list(self, table, filters, params, args):
+        sort = args.get('sort', 'name')
+        if sort not in SORT_COLUMNS or (table == 'datasets' and sort in ('accuracy', 'version')):
+            raise ValueError(f"Unsupported sort key '{sort}'")
+        order = args.get('order', 'asc').lower()
+        if order not in ('asc', 'desc'):
+            raise ValueError("order must be 'asc' or 'desc'")
+        try:
+            offset = int(args.get('offset', 0))
+            limit = int(args['limit']) if args.get('limit') else -1
+        except ValueError:
+            raise ValueError('offset and limit must be integers')
+
+        where = f"WHERE {' AND '.join(filters)}" if filters else ''
+        conn = self._connect()
+        total = conn.execute(f"SELECT COUNT(*) FROM {table} {where}", params).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT * FROM {table} {where} ORDER BY {SORT_COLUMNS[sort]} {order}, id LIMIT ? OFFSET ?",
+            params + [limit, offset]
+        ).fetchall()
+        return rows, total
+
+    # Reconciliation with the folders (files copied in by hand, catalog created late)
+
+    def sync(self, dataset_folder, model_folder):
+        """Add files the catalog doesn't know about (or that changed) and drop vanished ones"""
+        datasets = {
+            f for f in os.listdir(dataset_folder)
+            if _extension(f) in DATASET_EXTENSIONS and os.path.isfile(os.path.join(dataset_folder, f))
+        }
+        models = {
+            f for f in os.listdir(model_folder)
+            if not f.endswith(METADATA_SUFFIX) and os.path.isfile(os.path.join(model_folder, f))
+        }
+        conn = self._connect()
+        known_datasets = {r['id']: r for r in conn.execute('SELECT id, size, mtime_ns FROM datasets')}
+        known_models = {r['id']: r for r in conn.execute('SELECT id, size, mtime_ns FROM models')}
+
+        for dataset_id in datasets:
+            path = os.path.join(dataset_folder, dataset_id)
+            if self._changed(known_datasets.get(dataset_id), path):
+                self.upsert_dataset(dataset_id, path)
+        for dataset_id in set(known_datasets) - datasets:
+            self.delete_dataset(dataset_id)
+
+        for model_id in models:
+            path = os.path.join(model_folder, model_id)
+            if self._changed(known_models.get(model_id), path):
+                metadata = {}
+                metadata_path = path + METADATA_SUFFIX
+                if os.path.exists(metadata_path):
+                    with open(metadata_path, 'r') as f:
+                        metadata = json.load(f)
+                self.upsert_model(model_id, path, metadata)
+        for model_id in set(known_models) - models:
+            self.delete_model(model_id)
+
+    @staticmethod
+    def _changed(known, path):
+        if known is None:
+            return True
+        stats = os.stat(path)
+        return known['size'] != stats.st_size or known['mtime_ns'] != stats.st_mtime_ns
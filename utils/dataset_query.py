@@ -0,0 +1,118 @@
+import json
+
+import pandas as pd
+
+from utils.dataset_store import TIMESTAMP_COLUMN, align_timestamp, frame_to_records
+
+RESAMPLE_AGGREGATIONS = ['mean', 'min', 'max', 'sum', 'count']
+
+
+def _int_arg(args, name, default=None, minimum=0):
+    value = args.get(name)
+    if value in (None, ''):
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise ValueError(f"'{name}' must be an integer")
+    if value < minimum:
+        raise ValueError(f"'{name}' must be >= {minimum}")
+    return value
+
+
+def _timestamp_arg(args, name):
+    value = args.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return pd.Timestamp(value)
+    except ValueError:
+        raise ValueError(f"'{name}' is not a valid timestamp")
+
+
+def parse_query(args):
+    """Validate the dataset read query string; raises ValueError on bad input"""
+    columns = args.get('columns')
+    query = {
+        'offset': _int_arg(args, 'offset', 0),
+        'limit': _int_arg(args, 'limit'),
+        'columns': [c.strip() for c in columns.split(',') if c.strip()] if columns else None,
+        'start': _timestamp_arg(args, 'start'),
+        'end': _timestamp_arg(args, 'end'),
+        'resample': args.get('resample') or None,
+        'agg': [a.strip() for a in args.get('agg', 'mean').split(',') if a.strip()],
+    }
+
+    for agg in query['agg']:
+        if agg not in RESAMPLE_AGGREGATIONS:
+            raise ValueError(f"Unsupported aggregation '{agg}'")
+    if query['resample']:
+        try:
+            pd.tseries.frequencies.to_offset(query['resample'])
+        except ValueError:
+            raise ValueError(f"Invalid resample frequency '{query['resample']}'")
+    return query
+
+
+def apply_query(df, query):
+    """Filter, project, downsample and window a dataset frame"""
+    needs_time = query['start'] is not None or query['end'] is not None or query['resample']
+    if needs_time and TIMESTAMP_COLUMN not in df.columns:
+        raise ValueError(f"Dataset has no '{TIMESTAMP_COLUMN}' column")
+
+    if query['start'] is not None or query['end'] is not None:
+        timestamps = df[TIMESTAMP_COLUMN]
+        if not pd.api.types.is_datetime64_any_dtype(timestamps):
+            raise ValueError(f"Column '{TIMESTAMP_COLUMN}' does not hold timestamps")
+        # e.g. ?start=2020-01-02T00:00:00Z against naive timestamps
+        tz = getattr(timestamps.dtype, 'tz', None)
+        mask = pd.Series(True, index=df.index)
+        if query['start'] is not None:
+            mask &= timestamps >= align_timestamp(query['start'], tz)
+        if query['end'] is not None:
+            mask &= timestamps <= align_timestamp(query['end'], tz)
+        df = df[mask]
+
+    if query['columns']:
+        missing = [c for c in query['columns'] if c not in df.columns]
+        if missing:
+            raise ValueError(f"Unknown columns: {missing}")
+        keep = list(query['columns'])
+        if query['resample'] and TIMESTAMP_COLUMN not in keep:
+            keep.insert(0, TIMESTAMP_COLUMN)
+        df = df[keep]
+
+    if query['resample']:
+        df = resample_frame(df, query['resample'], query['agg'])
+
+    total = len(df)
+    start = query['offset']
+    stop = start + query['limit'] if query['limit'] is not None else None
+    return df.iloc[start:stop], total
+
+
+def resample_frame(df, rule, aggregations):
+    """Downsample numeric columns into time buckets"""
+    numeric = df.select_dtypes('number').columns.tolist()
+    grouped = df.set_index(TIMESTAMP_COLUMN)[numeric].resample(rule)
+    if len(aggregations) == 1:
+        out = grouped.agg(aggregations[0])
+    else:
+        out = grouped.agg(aggregations)
+        out.columns = [f"{column}_{agg}" for column, agg in out.columns]
+    return out.reset_index()
+
+
+def iter_json(df, header, chunk_rows):
+    """Yield a JSON document {**header, "data": [...]} a chunk of rows at a time"""
+    opening = json.dumps(header)
+    yield opening[:-1] + (', ' if header else '') + '"data": ['
+    first = True
+    for start in range(0, len(df), chunk_rows):
+        records = frame_to_records(df.iloc[start:start + chunk_rows])
+        body = json.dumps(records)[1:-1]
+        if not body:
+            continue
+        yield body if first else ', ' + body
+        first = False
+    yield ']}'
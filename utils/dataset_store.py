@@ -0,0 +1,266 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from utils.fileio import atomic_path, atomic_write, file_lock
+from utils.metrics import phase, record_bytes_read, record_bytes_written
+
+# Columns with a known meaning in OEE datasets
+TIMESTAMP_COLUMN = 'timestamp'
+CATEGORICAL_COLUMNS = ['shift']
+
+CACHE_SUFFIX = '.parquet'
+SIGNATURE_SUFFIX = '.signature.json'
+
+
+def file_signature(file_path):
+    """Cheap signature of a file used to detect changes (mtime + size)"""
+    stats = os.stat(file_path)
+    return {'mtime_ns': stats.st_mtime_ns, 'size': stats.st_size}
+
+
+def content_hash(file_path, chunk_size=1024 * 1024):
+    """SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_raw_dataset(file_path):
+    """Parse a raw CSV or JSON dataset into a DataFrame"""
+    if file_path.endswith('.csv'):
+        return pd.read_csv(file_path)
+    if file_path.endswith('.json'):
+        with open(file_path, 'r') as f:
+            data = json.load(f)
+        # Accept either a list of records or a {"data": [...]} wrapper
+        if isinstance(data, dict) and isinstance(data.get('data'), list):
+            data = data['data']
+        return pd.DataFrame(data)
+    raise ValueError(f"Unsupported dataset format: {file_path}")
+
+
+def coerce_types(df):
+    """Convert a freshly parsed frame to the typed columnar layout we cache"""
+    df = df.copy()
+    for column in df.columns:
+        series = df[column]
+        if column == TIMESTAMP_COLUMN:
+            df[column] = pd.to_datetime(series, errors='coerce')
+        elif column in CATEGORICAL_COLUMNS:
+            df[column] = series.astype('category')
+        elif pd.api.types.is_float_dtype(series):
+            df[column] = series.astype(np.float32)
+        elif pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+            # Text columns (object, or str on pandas 3) that are numeric apart from a few bad cells become float32
+            numeric = pd.to_numeric(series, errors='coerce')
+            if numeric.notna().sum() >= series.notna().sum() * 0.9 and numeric.notna().any():
+                df[column] = numeric.astype(np.float32)
+    return df
+
+
+def align_timestamp(value, tz):
+    """Express a Timestamp in the timezone of the column it is compared with (tz None = naive)
+
+    Aware values are converted to the column's zone, or to naive UTC for naive columns;
+    naive values are taken to already be in the column's zone.
+    """
+    if value.tzinfo is None:
+        return value if tz is None else value.tz_localize(tz)
+    return value.tz_convert(tz)
+
+
+def frame_to_records(df):
+    """Convert a frame to JSON-friendly records (ISO timestamps, None for NaN)"""
+    df = df.copy()
+    for column in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[column]):
+            df[column] = df[column].dt.strftime('%Y-%m-%dT%H:%M:%S')
+        elif df[column].dtype == np.float32:
+            # Widen through the shortest float32 repr so 0.6 is sent as 0.6, not 0.6000000238418579
+            df[column] = df[column].to_numpy().astype(str).astype(np.float64)
+    df = df.astype(object).where(df.notna(), None)
+    return df.to_dict('records')
+
+
+def frame_nbytes(df):
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+class FrameCache:
+    """Thread-safe LRU of DataFrames bounded by their in-memory size"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, df):
+        size = frame_nbytes(df)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = (df, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._pop(oldest)
+
+    def discard(self, dataset_id):
+        """Drop every cached frame belonging to a dataset"""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == dataset_id]:
+                self._pop(key)
+
+    def _pop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry[1]
+
+
+class DatasetStore:
+    """Typed Parquet cache of uploaded datasets with an in-process LRU on top"""
+
+    def __init__(self, dataset_folder, cache_folder, max_bytes):
+        self.dataset_folder = dataset_folder
+        self.cache_folder = cache_folder
+        self.frames = FrameCache(max_bytes)
+        os.makedirs(self.cache_folder, exist_ok=True)
+
+    def source_path(self, dataset_id):
+        return os.path.join(self.dataset_folder, dataset_id)
+
+    def cache_path(self, dataset_id):
+        return os.path.join(self.cache_folder, dataset_id + CACHE_SUFFIX)
+
+    def signature_path(self, dataset_id):
+        return os.path.join(self.cache_folder, dataset_id + SIGNATURE_SUFFIX)
+
+    def lock(self, dataset_id):
+        """Exclusive lock for changes to a dataset's raw file and everything derived from it"""
+        return file_lock(os.path.join(self.cache_folder, dataset_id))
+
+    def exists(self, dataset_id):
+        return os.path.exists(self.source_path(dataset_id))
+
+    def convert(self, dataset_id):
+        """Parse the raw file once and write its typed Parquet copy"""
+        with file_lock(self.cache_path(dataset_id)):
+            return self._convert(dataset_id)
+
+    def _convert(self, dataset_id):
+        source = self.source_path(dataset_id)
+        signature = file_signature(source)
+        with phase('parse'):
+            df = coerce_types(read_raw_dataset(source))
+        record_bytes_read('dataset', signature['size'])
+        self.write_cache(dataset_id, df, signature)
+        return df
+
+    def write_cache(self, dataset_id, df, signature, sha256=None):
+        """Persist a typed frame and the signature of the file it came from"""
+        with atomic_path(self.cache_path(dataset_id)) as tmp_path:
+            df.to_parquet(tmp_path, index=False)
+            record_bytes_written('parquet', os.path.getsize(tmp_path))
+
+        signature = dict(signature)
+        signature['sha256'] = sha256 or content_hash(self.source_path(dataset_id))
+        with atomic_write(self.signature_path(dataset_id)) as f:
+            json.dump(signature, f)
+
+        self.frames.discard(dataset_id)
+        self.frames.put((dataset_id, signature['mtime_ns'], signature['size']), df)
+
+    def adopt_cache(self, dataset_id, raw_path, parquet_path, sha256):
+        """Move a staged raw file and the Parquet copy written from it (streaming ingest) into place"""
+        with self.lock(dataset_id), file_lock(self.cache_path(dataset_id)):
+            self.frames.discard(dataset_id)
+            os.replace(raw_path, self.source_path(dataset_id))
+            os.replace(parquet_path, self.cache_path(dataset_id))
+            signature = file_signature(self.source_path(dataset_id))
+            signature['sha256'] = sha256
+            with atomic_write(self.signature_path(dataset_id)) as f:
+                json.dump(signature, f)
+
+    def cached_signature(self, dataset_id):
+        try:
+            with open(self.signature_path(dataset_id), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def known_signature(self, dataset_id):
+        """Stored signature (with sha256) if it still matches the file, else None; never reads the data"""
+        cached = self.cached_signature(dataset_id)
+        if cached and self._matches(cached, file_signature(self.source_path(dataset_id))):
+            return cached
+        return None
+
+    def signature(self, dataset_id):
+        """Signature of the current file, including its content hash"""
+        current = file_signature(self.source_path(dataset_id))
+        cached = self.cached_signature(dataset_id)
+        if cached and self._matches(cached, current):
+            return cached
+        self.load(dataset_id)
+        return self.cached_signature(dataset_id)
+
+    def load(self, dataset_id):
+        """Return the typed frame for a dataset, parsing the raw file only when it changed"""
+        current = file_signature(self.source_path(dataset_id))
+        key = (dataset_id, current['mtime_ns'], current['size'])
+
+        df = self.frames.get(key)
+        if df is not None:
+            return df
+        df = self._read_cache(dataset_id, current)
+        if df is not None:
+            return df
+
+        # One parser per dataset across threads and worker processes; the others wait and read its copy
+        with file_lock(self.cache_path(dataset_id)):
+            df = self._read_cache(dataset_id, current)
+            if df is not None:
+                return df
+            return self._convert(dataset_id)
+
+    def _read_cache(self, dataset_id, current):
+        """The Parquet copy if it was written from the current file, else None"""
+        cached = self.cached_signature(dataset_id)
+        if not (cached and self._matches(cached, current)):
+            return None
+        try:
+            df = pd.read_parquet(self.cache_path(dataset_id))
+        except FileNotFoundError:
+            return None
+        record_bytes_read('parquet', os.path.getsize(self.cache_path(dataset_id)))
+        self.frames.put((dataset_id, current['mtime_ns'], current['size']), df)
+        return df
+
+    def invalidate(self, dataset_id):
+        """Forget everything cached for a dataset (after delete or re-upload)"""
+        self.frames.discard(dataset_id)
+        for path in (self.cache_path(dataset_id), self.signature_path(dataset_id)):
+            if os.path.exists(path):
+                os.remove(path)
+
+    @staticmethod
+    def _matches(cached, current):
+        return cached.get('mtime_ns') == current['mtime_ns'] and cached.get('size') == current['size']
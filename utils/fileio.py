@@ -0,0 +1,79 @@
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: locks only hold between threads of one process
+    fcntl = None
+
+# Temp files get the permissions open() would have given them, not mkstemp's 0600
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+_thread_locks = {}
+_thread_locks_guard = threading.Lock()
+
+
+def _reset_thread_locks():
+    # A forked worker must not inherit locks held by the parent's other threads
+    global _thread_locks_guard
+    _thread_locks.clear()
+    _thread_locks_guard = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_thread_locks)
+
+
+def temp_path(path):
+    """Create a unique empty file next to path, to be written and then os.replace()d onto it"""
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(path) or '.', prefix=os.path.basename(path) + '.', suffix='.tmp'
+    )
+    os.close(fd)
+    os.chmod(tmp_path, 0o666 & ~_UMASK)
+    return tmp_path
+
+
+@contextmanager
+def atomic_path(path):
+    """Yield a unique temp path that replaces path once the block succeeds
+
+    Concurrent writers never share a temp file, readers only ever see a complete file,
+    and the temp file is removed if the block raises.
+    """
+    tmp_path = temp_path(path)
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+@contextmanager
+def atomic_write(path, mode='w'):
+    """open() a unique temp file that atomically replaces path when the block succeeds"""
+    with atomic_path(path) as tmp_path:
+        with open(tmp_path, mode) as f:
+            yield f
+
+
+@contextmanager
+def file_lock(path):
+    """Hold an exclusive lock named after path (path + '.lock') across threads and processes"""
+    lock_path = path + '.lock'
+    with _thread_locks_guard:
+        thread_lock = _thread_locks.setdefault(lock_path, threading.Lock())
+    with thread_lock:
+        if fcntl is None:
+            yield
+            return
+        with open(lock_path, 'a') as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
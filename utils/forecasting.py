@@ -0,0 +1,353 @@
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from numpy.lib.stride_tricks import sliding_window_view
+from sklearn.exceptions import ConvergenceWarning
+from sklearn.neural_network import MLPRegressor
+
+from utils.dataset_store import TIMESTAMP_COLUMN
+
+DEFAULT_HORIZON = 24
+DEFAULT_LOOKBACK = 48
+DEFAULT_SEASON = 24  # hourly data repeats daily
+# Upper bounds on the request options: cost and response size grow linearly with the horizon,
+# and the AR fit with the square of the lookback
+MAX_HORIZON = 2000
+MAX_LOOKBACK = 1000
+RIDGE = 1e-3
+# Neural forecaster: one small network per batch of series, trained on at most this many windows
+MLP_HIDDEN_LAYERS = (32,)
+MLP_MAX_ITER = 200
+MLP_MAX_SAMPLES = 20000
+
+# Bumped whenever the built-in methods change, so cached forecasts are recomputed
+FORECASTER_VERSION = '3'
+
+RATIO_METRICS = ['OEE', 'availability', 'performance', 'quality']
+
+# Predefined model ids offered by the frontend -> forecasting method.
+# SARIMA runs as a seasonally differenced autoregression. The recurrent networks are
+# approximated on the CPU: LSTM as a small feed-forward network over the lookback
+# windows, GRU as a ridge autoregression over the same windows.
+PREDEFINED_MODELS = {
+    'sarima_model': 'seasonal_ar',
+    'lstm_model': 'mlp',
+    'gru_model': 'ar'
+}
+
+# Below this many series the process pool costs more than it saves
+PARALLEL_MIN_SERIES = 16
+
+
+def is_predefined(model_id):
+    return model_id in PREDEFINED_MODELS
+
+
+def extract_series(df, metrics, group_by=None):
+    """Split a dataset into one NaN-free value array per (group, metric)"""
+    if TIMESTAMP_COLUMN in df.columns:
+        df = df.sort_values(TIMESTAMP_COLUMN, kind='stable')
+    if group_by:
+        if group_by not in df.columns:
+            raise ValueError(f"Unknown groupBy column '{group_by}'")
+        parts = df.groupby(group_by, observed=True, sort=True)
+    else:
+        parts = [('all', df)]
+
+    series = []
+    for group, part in parts:
+        timestamps = part[TIMESTAMP_COLUMN] if TIMESTAMP_COLUMN in part.columns else None
+        for metric in metrics:
+            values = part[metric].astype(np.float64).ffill()
+            keep = values.notna().to_numpy()
+            series.append({
+                'group': str(group),
+                'metric': metric,
+                'values': values.to_numpy()[keep],
+                'timestamps': timestamps[keep] if timestamps is not None else None
+            })
+    return series
+
+
+def _future_timestamps(timestamps, horizon):
+    if timestamps is None or len(timestamps) < 2:
+        return None
+    step = timestamps.diff().median()
+    if pd.isna(step) or step <= pd.Timedelta(0):
+        return None
+    last = timestamps.iloc[-1]
+    return [(last + step * (i + 1)).isoformat() for i in range(horizon)]
+
+
+def _fit_ar(batch, lookback):
+    """Ridge AR coefficients for every row of a (series, time) batch in one batched solve"""
+    mean = batch.mean(axis=1, keepdims=True)
+    centered = batch - mean
+    # (series, samples, lookback) view over the centered batch; no window copies
+    windows = sliding_window_view(centered, lookback, axis=1)[:, :-1, :]
+    targets = centered[:, lookback:]
+    samples = targets.shape[1]
+
+    gram = np.matmul(windows.transpose(0, 2, 1), windows)
+    gram += RIDGE * samples * np.eye(lookback)
+    moments = np.matmul(windows.transpose(0, 2, 1), targets[..., None])[..., 0]
+    weights = np.linalg.solve(gram, moments[..., None])[..., 0]
+    return weights, mean
+
+
+def _predict_ar(batch, weights, mean, horizon):
+    lookback = weights.shape[1]
+    window = batch[:, -lookback:] - mean
+    predictions = np.empty((batch.shape[0], horizon))
+    for step in range(horizon):
+        predictions[:, step] = np.einsum('sl,sl->s', window, weights)
+        window = np.concatenate([window[:, 1:], predictions[:, step:step + 1]], axis=1)
+    return predictions + mean
+
+
+def _forecast_ar(batch, lookback, horizon):
+    lookback = max(1, min(lookback, (batch.shape[1] - 1) // 2))
+    weights, mean = _fit_ar(batch, lookback)
+    return _predict_ar(batch, weights, mean, horizon)
+
+
+def _forecast_seasonal_ar(batch, lookback, horizon, season=DEFAULT_SEASON):
+    """AR on the seasonally differenced series, integrated back to levels"""
+    length = batch.shape[1]
+    if length - season < 5:
+        # Too short to difference by a whole season
+        return _forecast_ar(batch, lookback, horizon)
+
+    diffs = batch[:, season:] - batch[:, :-season]
+    diff_forecast = _forecast_ar(diffs, lookback, horizon)
+
+    history = np.concatenate([batch, np.empty((batch.shape[0], horizon))], axis=1)
+    for step in range(horizon):
+        position = length + step
+        history[:, position] = history[:, position - season] + diff_forecast[:, step]
+    return history[:, length:]
+
+
+def _fit_mlp(batch, lookback):
+    """One MLP shared by every series of a (series, time) batch, fitted on standardized windows"""
+    mean = batch.mean(axis=1, keepdims=True)
+    scale = batch.std(axis=1, keepdims=True)
+    scale[scale == 0] = 1.0
+    standardized = (batch - mean) / scale
+
+    # Pick (series, position) pairs first so only the sampled windows are copied
+    samples = batch.shape[1] - lookback
+    picks = np.arange(batch.shape[0] * samples)
+    if len(picks) > MLP_MAX_SAMPLES:
+        picks = np.linspace(0, len(picks) - 1, MLP_MAX_SAMPLES).astype(np.int64)
+    rows, positions = picks // samples, picks % samples
+    windows = sliding_window_view(standardized, lookback, axis=1)[rows, positions]
+    targets = standardized[rows, positions + lookback]
+
+    # Stop once a 10% validation split stops improving, when there are enough windows to hold one out
+    model = MLPRegressor(
+        hidden_layer_sizes=MLP_HIDDEN_LAYERS, max_iter=MLP_MAX_ITER,
+        early_stopping=len(targets) >= 100, random_state=0
+    )
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', ConvergenceWarning)
+        model.fit(windows, targets)
+    return model, mean, scale
+
+
+def _forecast_mlp(batch, lookback, horizon):
+    lookback = max(1, min(lookback, (batch.shape[1] - 1) // 2))
+    model, mean, scale = _fit_mlp(batch, lookback)
+    predictions = _forecast_estimator((batch - mean) / scale, model, lookback, horizon) * scale + mean
+    # A constant series carries nothing to learn; keep it flat instead of trusting the network's output
+    constant = (batch == batch[:, :1]).all(axis=1)
+    predictions[constant] = mean[constant]
+    return predictions
+
+
+def _forecast_estimator(batch, estimator, lookback, horizon):
+    """Recursive forecast with a fitted regressor that maps a lookback window to the next value"""
+    expected = getattr(estimator, 'n_features_in_', lookback)
+    if expected != lookback:
+        raise ValueError(f"Model expects a lookback window of {expected}, got {lookback}")
+    if batch.shape[1] < lookback:
+        raise ValueError(f"Series shorter than the lookback window ({lookback})")
+
+    window = batch[:, -lookback:].copy()
+    predictions = np.empty((batch.shape[0], horizon))
+    for step in range(horizon):
+        # One predict call covers every series in the batch
+        predictions[:, step] = np.asarray(estimator.predict(window), dtype=np.float64).reshape(-1)
+        window = np.concatenate([window[:, 1:], predictions[:, step:step + 1]], axis=1)
+    return predictions
+
+
+def _forecast(batch, method, lookback, horizon, estimator=None):
+    if method == 'estimator':
+        return _forecast_estimator(batch, estimator, lookback, horizon)
+    if method == 'seasonal_ar':
+        return _forecast_seasonal_ar(batch, lookback, horizon)
+    if method == 'mlp':
+        return _forecast_mlp(batch, lookback, horizon)
+    return _forecast_ar(batch, lookback, horizon)
+
+
+def _forecast_batch(batch, method, lookback, horizon, holdout, estimator=None):
+    """Forecast a (series, time) batch and backtest it on the last `holdout` points"""
+    forecast = _forecast(batch, method, lookback, horizon, estimator)
+    errors = None
+    if holdout:
+        predicted = _forecast(batch[:, :-holdout], method, lookback, holdout, estimator)
+        errors = predicted - batch[:, -holdout:]
+    return forecast, errors
+
+
+def forecast_series(series, method='ar', horizon=DEFAULT_HORIZON, lookback=DEFAULT_LOOKBACK,
+                    estimator=None, n_jobs=None):
+    """Forecast many series at once
+
+    Series of equal length are stacked into one batch so fitting and prediction run as
+    batched array operations; independent batches are spread over worker processes.
+    """
+    if horizon < 1 or lookback < 1:
+        raise ValueError('horizon and lookback must be positive')
+    minimum = lookback + 2 if method == 'estimator' else 4
+    usable = [s for s in series if len(s['values']) >= minimum]
+    if not usable:
+        raise ValueError('Not enough data to forecast')
+
+    by_length = {}
+    for index, item in enumerate(usable):
+        by_length.setdefault(len(item['values']), []).append(index)
+
+    tasks = []
+    for length, indices in by_length.items():
+        holdout = min(horizon, length // 5)
+        if method == 'estimator' and length - holdout < lookback:
+            holdout = 0
+        batch = np.stack([usable[i]['values'] for i in indices])
+        tasks.append((indices, batch, holdout))
+
+    n_jobs = n_jobs or os.cpu_count() or 1
+    if n_jobs > 1 and len(usable) >= PARALLEL_MIN_SERIES:
+        # Split the largest batches so every worker gets a share of the series
+        split = []
+        for indices, batch, holdout in tasks:
+            pieces = max(1, min(n_jobs, len(indices) // 4))
+            for part in np.array_split(np.arange(len(indices)), pieces):
+                split.append(([indices[i] for i in part], batch[part], holdout))
+        tasks = split
+        outputs = Parallel(n_jobs=n_jobs)(
+            delayed(_forecast_batch)(batch, method, lookback, horizon, holdout, estimator)
+            for _, batch, holdout in tasks
+        )
+    else:
+        outputs = [_forecast_batch(batch, method, lookback, horizon, holdout, estimator)
+                   for _, batch, holdout in tasks]
+
+    results = [None] * len(usable)
+    for (indices, _, _), (forecast, errors) in zip(tasks, outputs):
+        for row, index in enumerate(indices):
+            item = usable[index]
+            values = forecast[row]
+            if item['metric'] in RATIO_METRICS:
+                values = np.clip(values, 0.0, 1.0)
+            backtest = None
+            if errors is not None:
+                backtest = {
+                    'mae': float(np.mean(np.abs(errors[row]))),
+                    'rmse': float(np.sqrt(np.mean(errors[row] ** 2))),
+                    'points': int(errors.shape[1])
+                }
+            results[index] = {
+                'group': item['group'],
+                'metric': item['metric'],
+                'forecast': [float(v) for v in values],
+                'timestamps': _future_timestamps(item['timestamps'], horizon),
+                'backtest': backtest
+            }
+    return results
+
+
+def forecast_method(model_id, model=None):
+    """Pick the forecasting method for a predefined model id or a loaded model object
+
+    Raises ValueError for a model that cannot forecast (not loaded, or without predict()),
+    rather than reporting a built-in method's results under its id.
+    """
+    if model_id in PREDEFINED_MODELS:
+        return PREDEFINED_MODELS[model_id]
+    if model is not None and hasattr(model, 'predict'):
+        return 'estimator'
+    if model is None:
+        raise ValueError(f"Model '{model_id}' has an unsupported format and cannot forecast")
+    raise ValueError(f"Model '{model_id}' has no predict() method and cannot forecast")
+
+
+def _bounded_option(params, name, default, maximum):
+    value = params.get(name) or default
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{name}' must be an integer")
+    if value < 1 or value > maximum:
+        raise ValueError(f"'{name}' must be between 1 and {maximum}")
+    return value
+
+
+def forecast_options(params):
+    """(horizon, lookback) from request params; raises ValueError when out of bounds"""
+    return (
+        _bounded_option(params, 'horizon', DEFAULT_HORIZON, MAX_HORIZON),
+        _bounded_option(params, 'lookback', DEFAULT_LOOKBACK, MAX_LOOKBACK)
+    )
+
+
+def prepare_forecast(df, params):
+    """Check the forecast options and extract the series; reusable by every model run on df"""
+    horizon, lookback = forecast_options(params)
+    group_by = params.get('groupBy') or None
+    metrics = params.get('metrics') or [m for m in RATIO_METRICS if m in df.columns]
+    missing = [m for m in metrics if m not in df.columns]
+    if missing:
+        raise ValueError(f"Unknown metrics: {missing}")
+    if not metrics:
+        raise ValueError('Dataset has no OEE metrics to forecast')
+    return {
+        'horizon': horizon,
+        'lookback': lookback,
+        'groupBy': group_by,
+        'series': extract_series(df, metrics, group_by)
+    }
+
+
+def run_forecast(df, params, model_id=None, model=None, prepared=None):
+    """Forecast OEE and its components for the whole dataset or per group
+
+    prepared is the output of prepare_forecast(df, params) when it was already computed.
+    """
+    method = forecast_method(model_id, model)
+    prepared = prepared or prepare_forecast(df, params)
+    horizon, lookback, group_by = prepared['horizon'], prepared['lookback'], prepared['groupBy']
+
+    results = forecast_series(
+        prepared['series'], method, horizon, lookback,
+        estimator=model if method == 'estimator' else None,
+        n_jobs=params.get('jobs')
+    )
+
+    scored = [r['backtest'] for r in results if r['backtest']]
+    return {
+        'method': method,
+        'horizon': horizon,
+        'lookback': lookback,
+        'groupBy': group_by,
+        'series': results,
+        'backtest': {
+            'mae': float(np.mean([b['mae'] for b in scored])),
+            'rmse': float(np.mean([b['rmse'] for b in scored]))
+        } if scored else None
+    }
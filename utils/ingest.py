@@ -0,0 +1,158 @@
+import io
+import os
+import hashlib
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils.dataset_store import coerce_types
+from utils.fileio import temp_path
+from utils.validation import ValidationReport
+
+# Column kinds and the Arrow type each is stored as
+ARROW_TYPES = {
+    'timestamp': pa.timestamp('us'),
+    'category': pa.dictionary(pa.int32(), pa.string()),
+    'float': pa.float32(),
+    'int': pa.int64(),
+    'string': pa.string()
+}
+
+
+class _TeeStream(io.RawIOBase):
+    """Readable wrapper that copies every byte it reads to a sink and hashes it"""
+
+    def __init__(self, source, sink):
+        self.source = source
+        self.sink = sink
+        self.digest = hashlib.sha256()
+        self.bytes_read = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.source.read(len(buffer))
+        if not data:
+            return 0
+        size = len(data)
+        buffer[:size] = data
+        self.sink.write(data)
+        self.digest.update(data)
+        self.bytes_read += size
+        return size
+
+
+def infer_schema(df):
+    """Column kinds inferred from the first chunk, using the same rules as the cached copies"""
+    typed = coerce_types(df)
+    schema = {}
+    for column in typed.columns:
+        dtype = typed[column].dtype
+        if pd.api.types.is_datetime64_any_dtype(dtype):
+            schema[column] = 'timestamp'
+        elif isinstance(dtype, pd.CategoricalDtype):
+            schema[column] = 'category'
+        elif pd.api.types.is_float_dtype(dtype):
+            schema[column] = 'float'
+        elif pd.api.types.is_integer_dtype(dtype):
+            schema[column] = 'int'
+        else:
+            schema[column] = 'string'
+    return schema
+
+
+def apply_schema(df, schema):
+    """Convert a raw chunk to the schema; returns (typed frame, column -> invalid-cell mask)"""
+    typed = {}
+    invalid = {}
+    for column, kind in schema.items():
+        if column not in df.columns:
+            typed[column] = pd.Series(None, index=df.index, dtype=object)
+            continue
+        raw = df[column]
+        present = raw.notna()
+        if kind == 'timestamp':
+            values = pd.to_datetime(raw, errors='coerce')
+        elif kind in ('float', 'int'):
+            values = pd.to_numeric(raw, errors='coerce')
+            if kind == 'int':
+                # Non-integral values in an integer column count as invalid
+                values = values.where(np.floor(values) == values)
+        else:
+            # Vectorized: numbers in a text column become their text, missing cells stay NA
+            values = raw.astype('string')
+        typed[column] = values
+        invalid[column] = present & values.isna()
+    return pd.DataFrame(typed, index=df.index), invalid
+
+
+def arrow_schema(schema):
+    return pa.schema([pa.field(str(column), ARROW_TYPES[kind]) for column, kind in schema.items()])
+
+
+def stream_csv_to_parquet(stream, raw_path, parquet_path, chunk_rows=50000, read_size=1024 * 1024,
+                          report=None):
+    """Read a CSV body in chunks, keep a raw copy, and write typed row groups to Parquet
+
+    Memory stays bounded by chunk_rows. Returns (schema, report, sha256 of the raw bytes).
+    """
+    report = report or ValidationReport()
+    schema = None
+    writer = None
+    row_offset = 0
+    tmp_path = temp_path(parquet_path)
+
+    try:
+        with open(raw_path, 'wb') as sink:
+            tee = _TeeStream(stream, sink)
+            reader = pd.read_csv(io.BufferedReader(tee, buffer_size=read_size), chunksize=chunk_rows)
+            for chunk in reader:
+                if schema is None:
+                    schema = infer_schema(chunk)
+                    report.check_columns(list(schema))
+                    writer = pq.ParquetWriter(tmp_path, arrow_schema(schema))
+                unknown = [c for c in chunk.columns if c not in schema]
+                if unknown:
+                    raise ValueError(f"Unexpected columns after the header: {unknown}")
+
+                typed, invalid = apply_schema(chunk, schema)
+                report.update(typed, invalid, row_offset)
+                writer.write_table(pa.Table.from_pandas(typed, schema=arrow_schema(schema), preserve_index=False))
+                row_offset += len(chunk)
+
+        if writer is None:
+            raise ValueError('Dataset is empty')
+        writer.close()
+        writer = None
+        os.replace(tmp_path, parquet_path)
+        return schema, report, tee.digest.hexdigest()
+    finally:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def ingest_stream(stream, dataset_store, dataset_id, chunk_rows=50000, strict=False):
+    """Stream an uploaded CSV into the dataset folder and the store's typed Parquet cache
+
+    The upload is staged under unique names next to the live files and only replaces them
+    once it parsed (and, when strict, passed validation), so a bad re-upload leaves the
+    existing dataset intact and concurrent uploads of one filename never share staging files.
+    Returns (schema, report); with strict, check report.valid to know whether it was kept.
+    """
+    staged_raw = temp_path(dataset_store.source_path(dataset_id))
+    staged_cache = temp_path(dataset_store.cache_path(dataset_id))
+    try:
+        schema, report, sha256 = stream_csv_to_parquet(stream, staged_raw, staged_cache, chunk_rows)
+        if strict and not report.valid:
+            return schema, report
+        dataset_store.adopt_cache(dataset_id, staged_raw, staged_cache, sha256)
+    finally:
+        for path in (staged_raw, staged_cache):
+            if os.path.exists(path):
+                os.remove(path)
+    return schema, report
@@ -0,0 +1,165 @@
+import os
+import json
+import uuid
+import atexit
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+from utils.fileio import atomic_write
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATES = ['completed', 'failed', 'cancelled']
+
+
+class JobManager:
+    """Runs CPU-bound jobs in a bounded process pool and keeps their results on disk"""
+
+    def __init__(self, result_folder, max_workers=None, max_jobs=1000, initializer=None, initargs=()):
+        self.result_folder = result_folder
+        self.max_workers = max_workers
+        # Run once in each worker process as it starts (e.g. to open stores and warm models)
+        self.initializer = initializer
+        self.initargs = initargs
+        self.max_jobs = max_jobs
+        self._jobs = OrderedDict()
+        self._futures = {}
+        # Re-entrant: cancelling a future runs its done callback on this thread
+        self._lock = threading.RLock()
+        self._executor = None
+        os.makedirs(self.result_folder, exist_ok=True)
+        atexit.register(self.shutdown)
+
+    def result_path(self, job_id):
+        return os.path.join(self.result_folder, f"{job_id}.json")
+
+    def submit(self, fn, *args, on_success=None, **info):
+        """Queue fn(*args) in the pool; info is stored on the job record. Returns the job
+
+        on_success(output) is called in the parent process with the worker's return value.
+        """
+        job_id = uuid.uuid4().hex
+        job = {
+            'id': job_id,
+            'status': 'queued',
+            'submittedAt': datetime.now().isoformat(),
+            **info
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+            self._prune()
+            try:
+                future = self._pool().submit(fn, *args)
+            except BrokenProcessPool:
+                # A crashed worker breaks the whole pool; start a fresh one
+                self._executor = None
+                future = self._pool().submit(fn, *args)
+            self._futures[job_id] = future
+        future.add_done_callback(lambda f: self._finish(job_id, f, on_success))
+        return dict(job)
+
+    def get(self, job_id, include_result=True):
+        """Job record (with result once finished), or None if unknown"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job = dict(job)
+                future = self._futures.get(job_id)
+                if job['status'] == 'queued' and future is not None and future.running():
+                    job['status'] = 'running'
+        if job is not None and (job['status'] not in FINISHED_STATES or not include_result):
+            return job
+
+        # Finished jobs (including ones from before a restart) are read from disk
+        try:
+            with open(self.result_path(job_id), 'r') as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return job
+        if not include_result:
+            stored.pop('result', None)
+        return stored
+
+    def cancel(self, job_id):
+        """Cancel a job. Queued jobs never start; a running job is not interrupted
+
+        Its worker keeps computing until the job finishes, and the result is then discarded.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job['status'] in FINISHED_STATES:
+                return job
+            job['status'] = 'cancelled'
+            job['finishedAt'] = datetime.now().isoformat()
+            future = self._futures.get(job_id)
+            if future is not None:
+                future.cancel()
+            self._write(job)
+            return dict(job)
+
+    def executor(self):
+        """The shared process pool, for work fanned out without job records (e.g. validation ranges)"""
+        with self._lock:
+            return self._pool()
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _pool(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, initializer=self.initializer, initargs=self.initargs
+            )
+        return self._executor
+
+    def _finish(self, job_id, future, on_success=None):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            self._futures.pop(job_id, None)
+            if job is None or job['status'] == 'cancelled':
+                return
+
+            job['finishedAt'] = datetime.now().isoformat()
+            try:
+                output = future.result()
+                job['status'] = 'completed'
+                job['startedAt'] = output.get('startedAt')
+                job['computeSeconds'] = output.get('computeSeconds')
+                result = output.get('results')
+                if on_success is not None:
+                    on_success(output)
+            except Exception as e:
+                logger.error(f"Job {job_id} failed: {e}")
+                job['status'] = 'failed'
+                job['error'] = str(e)
+                result = None
+
+            submitted = datetime.fromisoformat(job['submittedAt'])
+            job['totalSeconds'] = (datetime.fromisoformat(job['finishedAt']) - submitted).total_seconds()
+            if job.get('startedAt'):
+                job['queueSeconds'] = (datetime.fromisoformat(job['startedAt']) - submitted).total_seconds()
+            self._write(job, result)
+
+    def _write(self, job, result=None):
+        record = dict(job)
+        if result is not None:
+            record['result'] = result
+        with atomic_write(self.result_path(job['id'])) as f:
+            json.dump(record, f)
+
+    def _prune(self):
+        # Forget the oldest finished jobs once we track more than max_jobs
+        while len(self._jobs) > self.max_jobs:
+            oldest = next((k for k, j in self._jobs.items() if j['status'] in FINISHED_STATES), None)
+            if oldest is None:
+                break
+            del self._jobs[oldest]
+            if os.path.exists(self.result_path(oldest)):
+                os.remove(self.result_path(oldest))
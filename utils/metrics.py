@@ -0,0 +1,276 @@
+import time
+import pstats
+import bisect
+import threading
+from contextvars import ContextVar
+
+# Latency buckets in seconds (Prometheus 'le' bounds; +Inf is implicit)
+DEFAULT_BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60]
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + (extra or [])
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with labels"""
+
+    type = 'counter'
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(labels.get(name, '') for name in self.labelnames), 0)
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in values]
+
+
+class Histogram:
+    """Bucketed distribution with labels (count, sum and cumulative buckets per label set)"""
+
+    type = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=None):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = sorted(buckets or DEFAULT_BUCKETS)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                # Per-bucket counts (last slot is +Inf), sum, count
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def samples(self):
+        with self._lock:
+            values = sorted((key, [list(e[0]), e[1], e[2]]) for key, e in self._values.items())
+        lines = []
+        for key, (counts, total, count) in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ['+Inf'], counts):
+                cumulative += bucket_count
+                le = bound if bound == '+Inf' else _format_value(float(bound))
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', le)])} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named metrics rendered together in the Prometheus text exposition format"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name, help, labelnames=()):
+        metric = Counter(name, help, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, labelnames=(), buckets=None):
+        metric = Histogram(name, help, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+REQUESTS = REGISTRY.counter(
+    'oee360_http_requests_total', 'HTTP requests handled', ['method', 'endpoint', 'status']
+)
+REQUEST_SECONDS = REGISTRY.histogram(
+    'oee360_http_request_duration_seconds', 'Time spent in the view, excluding streamed bodies',
+    ['method', 'endpoint']
+)
+PHASE_SECONDS = REGISTRY.histogram(
+    'oee360_phase_duration_seconds', 'Time spent per request phase (load, parse, compute, serialize, ...)',
+    ['endpoint', 'phase']
+)
+BYTES_READ = REGISTRY.counter(
+    'oee360_bytes_read_total', 'Bytes read from request bodies and data files', ['endpoint', 'source']
+)
+BYTES_WRITTEN = REGISTRY.counter(
+    'oee360_bytes_written_total', 'Bytes written to responses and data files', ['endpoint', 'sink']
+)
+
+# Metrics of the request being handled on this thread (None outside requests,
+# e.g. in analytics worker processes, where phases are labelled 'background')
+_current = ContextVar('oee360_request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Phase timings and byte counts accumulated over one request"""
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.bytes_read = {}
+        self.bytes_written = {}
+
+    def to_dict(self):
+        return {
+            'endpoint': self.endpoint,
+            'seconds': time.perf_counter() - self.started,
+            'phases': self.phases,
+            'bytesRead': self.bytes_read,
+            'bytesWritten': self.bytes_written
+        }
+
+
+def begin_request(endpoint):
+    state = RequestMetrics(endpoint)
+    return state, _current.set(state)
+
+
+def end_request(state, token, method, status, bytes_in=None, bytes_out=None):
+    """Record the request counters; bytes_out is None for streamed bodies (counted while streaming)"""
+    REQUESTS.inc(method=method, endpoint=state.endpoint, status=str(status))
+    REQUEST_SECONDS.observe(time.perf_counter() - state.started, method=method, endpoint=state.endpoint)
+    if bytes_in:
+        record_bytes_read('request', bytes_in, state)
+    if bytes_out:
+        record_bytes_written('response', bytes_out, state)
+    _current.reset(token)
+
+
+def _state(state=None):
+    state = state or _current.get()
+    return state, state.endpoint if state is not None else 'background'
+
+
+def record_phase(name, seconds, state=None, endpoint=None):
+    state, current_endpoint = _state(state)
+    PHASE_SECONDS.observe(seconds, endpoint=endpoint or current_endpoint, phase=name)
+    if state is not None:
+        state.phases[name] = state.phases.get(name, 0.0) + seconds
+
+
+def record_phases(phases, endpoint):
+    """Fold phases timed elsewhere (e.g. in a worker process) into the histograms"""
+    for name, seconds in phases.items():
+        PHASE_SECONDS.observe(seconds, endpoint=endpoint, phase=name)
+
+
+def record_bytes_read(source, count, state=None):
+    state, endpoint = _state(state)
+    BYTES_READ.inc(count, endpoint=endpoint, source=source)
+    if state is not None:
+        state.bytes_read[source] = state.bytes_read.get(source, 0) + count
+
+
+def record_bytes_written(sink, count, state=None):
+    state, endpoint = _state(state)
+    BYTES_WRITTEN.inc(count, endpoint=endpoint, sink=sink)
+    if state is not None:
+        state.bytes_written[sink] = state.bytes_written.get(sink, 0) + count
+
+
+class phase:
+    """Time a block as one phase of the current request
+
+        with phase('load') as timer:
+            df = dataset_store.load(dataset_id)
+        timer.seconds
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.seconds = 0.0
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds = time.perf_counter() - self._started
+        record_phase(self.name, self.seconds)
+        return False
+
+
+def timed_iter(chunks, name='serialize'):
+    """Wrap a streamed response body: time producing each chunk and count the bytes sent"""
+    # Bound now: the body is iterated after the view (and its request metrics) returned
+    state = _current.get()
+
+    def iterate():
+        seconds = 0.0
+        sent = 0
+        iterator = iter(chunks)
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    chunk = next(iterator)
+                except StopIteration:
+                    break
+                finally:
+                    seconds += time.perf_counter() - started
+                sent += len(chunk)
+                yield chunk
+        finally:
+            record_phase(name, seconds, state)
+            record_bytes_written('response', sent, state)
+
+    return iterate()
+
+
+def profile_report(profiler, sort='cumulative', limit=40):
+    """Top functions of a finished cProfile run as JSON-friendly rows"""
+    if sort not in ('cumulative', 'tottime', 'calls'):
+        sort = 'cumulative'
+    stats = pstats.Stats(profiler).stats
+    rows = []
+    for (filename, line, function), (primitive_calls, calls, total, cumulative, _) in stats.items():
+        rows.append({
+            'function': f"{filename}:{line}({function})",
+            'calls': calls,
+            'primitiveCalls': primitive_calls,
+            'tottime': total,
+            'cumulative': cumulative
+        })
+    rows.sort(key=lambda row: row[sort], reverse=True)
+    return {
+        'totalCalls': sum(row['calls'] for row in rows),
+        'sort': sort,
+        'functions': rows[:limit]
+    }
@@ -0,0 +1,157 @@
+import os
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+
+import joblib
+
+from utils.dataset_store import content_hash
+from utils.metrics import record_bytes_read
+
+logger = logging.getLogger(__name__)
+
+JOBLIB_EXTENSIONS = ['pkl', 'joblib']
+JSON_EXTENSIONS = ['json']
+METADATA_SUFFIX = '.metadata.json'
+
+
+def model_extension(model_id):
+    return model_id.rsplit('.', 1)[1].lower() if '.' in model_id else ''
+
+
+class ModelRegistry:
+    """Loads models from MODEL_FOLDER once and keeps hot ones in a byte-bounded LRU"""
+
+    def __init__(self, model_folder, max_bytes, mmap_mode='r'):
+        self.model_folder = model_folder
+        self.max_bytes = max_bytes
+        self.mmap_mode = mmap_mode
+        self.current_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self._hashes = {}
+
+    def path(self, model_id):
+        return os.path.join(self.model_folder, model_id)
+
+    def metadata_path(self, model_id):
+        return os.path.join(self.model_folder, f"{model_id}{METADATA_SUFFIX}")
+
+    def supports(self, model_id):
+        return model_extension(model_id) in JOBLIB_EXTENSIONS + JSON_EXTENSIONS
+
+    def get(self, model_id):
+        """Return the loaded model entry, loading it on first use or after the file changed"""
+        if not self.supports(model_id):
+            raise ValueError(f"Unsupported model format: {model_id}")
+
+        stats = os.stat(self.path(model_id))
+        signature = (stats.st_mtime_ns, stats.st_size)
+
+        entry = self._lookup(model_id, signature)
+        if entry is not None:
+            return entry
+
+        # One loader per model id so concurrent requests don't unpickle it twice
+        with self._lock:
+            load_lock = self._load_locks.setdefault(model_id, threading.Lock())
+        with load_lock:
+            entry = self._lookup(model_id, signature)
+            if entry is None:
+                entry = self._load(model_id, signature)
+                self._store(model_id, entry)
+        return entry
+
+    def fingerprint(self, model_id):
+        """(content hash, metadata version) of a model file; hashes are memoized per mtime/size"""
+        stats = os.stat(self.path(model_id))
+        signature = (stats.st_mtime_ns, stats.st_size)
+        with self._lock:
+            known = self._hashes.get(model_id)
+        if known is None or known[0] != signature:
+            known = (signature, content_hash(self.path(model_id)))
+            with self._lock:
+                self._hashes[model_id] = known
+
+        version = '1.0'
+        if os.path.exists(self.metadata_path(model_id)):
+            with open(self.metadata_path(model_id), 'r') as f:
+                version = str(json.load(f).get('version', '1.0'))
+        return known[1], version
+
+    def invalidate(self, model_id):
+        """Drop a model so the next request reloads it (after upload or delete)"""
+        with self._lock:
+            self._pop(model_id)
+            self._hashes.pop(model_id, None)
+
+    def warm(self, model_ids):
+        """Pre-load models at startup; missing or broken ones are only logged"""
+        for model_id in model_ids:
+            try:
+                self.get(model_id)
+                logger.info(f"Pre-warmed model {model_id}")
+            except Exception as e:
+                logger.warning(f"Could not pre-warm model {model_id}: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                'models': list(self._entries),
+                'bytes': self.current_bytes,
+                'maxBytes': self.max_bytes
+            }
+
+    def _lookup(self, model_id, signature):
+        with self._lock:
+            entry = self._entries.get(model_id)
+            if entry is None:
+                return None
+            if entry['signature'] != signature:
+                self._pop(model_id)
+                return None
+            self._entries.move_to_end(model_id)
+            return entry
+
+    def _load(self, model_id, signature):
+        path = self.path(model_id)
+        started = time.perf_counter()
+        if model_extension(model_id) in JOBLIB_EXTENSIONS:
+            # Large numpy arrays inside joblib dumps are memory-mapped, not copied
+            model = joblib.load(path, mmap_mode=self.mmap_mode)
+        else:
+            with open(path, 'r') as f:
+                model = json.load(f)
+
+        metadata = {}
+        if os.path.exists(self.metadata_path(model_id)):
+            with open(self.metadata_path(model_id), 'r') as f:
+                metadata = json.load(f)
+
+        record_bytes_read('model', signature[1])
+        return {
+            'id': model_id,
+            'model': model,
+            'metadata': metadata,
+            'signature': signature,
+            'size': signature[1],
+            'loadSeconds': time.perf_counter() - started
+        }
+
+    def _store(self, model_id, entry):
+        if entry['size'] > self.max_bytes:
+            return
+        with self._lock:
+            self._pop(model_id)
+            self._entries[model_id] = entry
+            self.current_bytes += entry['size']
+            while self.current_bytes > self.max_bytes:
+                self._pop(next(iter(self._entries)))
+
+    def _pop(self, model_id):
+        entry = self._entries.pop(model_id, None)
+        if entry is not None:
+            self.current_bytes -= entry['size']
@@ -0,0 +1,168 @@
+import math
+import threading
+from collections import deque
+from datetime import datetime
+
+OEE_COMPONENTS = ['availability', 'performance', 'quality']
+
+
+def _value(raw):
+    """Float value of a row cell, or None if it is missing or not numeric"""
+    if isinstance(raw, bool) or raw is None:
+        return None
+    try:
+        value = float(raw)
+    except (TypeError, ValueError):
+        return None
+    return value if math.isfinite(value) else None
+
+
+class RunningStats:
+    """Welford mean/variance plus min/max, updated in O(1) per value"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+
+    def update(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else None
+
+    def to_dict(self):
+        variance = self.variance
+        return {
+            'count': self.count,
+            'mean': self.mean if self.count else None,
+            'std': math.sqrt(variance) if variance is not None else None,
+            'min': self.min,
+            'max': self.max
+        }
+
+
+class RollingWindow:
+    """Mean of the last `size` values with a running sum"""
+
+    def __init__(self, size):
+        self.size = size
+        self.values = deque()
+        self.total = 0.0
+
+    def update(self, value):
+        self.values.append(value)
+        self.total += value
+        if len(self.values) > self.size:
+            self.total -= self.values.popleft()
+
+    def to_dict(self):
+        count = len(self.values)
+        return {
+            'size': self.size,
+            'count': count,
+            'mean': self.total / count if count else None,
+            'last': self.values[-1] if count else None
+        }
+
+
+class LiveStream:
+    """Incrementally maintained OEE statistics for one live data feed"""
+
+    def __init__(self, stream_id, window_size):
+        self.stream_id = stream_id
+        self.window_size = window_size
+        self.rows = 0
+        self.version = 0
+        self.metrics = {}
+        self.window = RollingWindow(window_size)
+        self.shifts = {}
+        self.last_row = None
+        self.updated_at = None
+        self.changed = threading.Condition()
+
+    def append(self, rows):
+        """Fold new rows into the statistics; cost is O(1) per row and metric"""
+        with self.changed:
+            for row in rows:
+                self._update(row)
+            self.version += 1
+            self.updated_at = datetime.now().isoformat()
+            self.changed.notify_all()
+            return self._snapshot()
+
+    def snapshot(self):
+        with self.changed:
+            return self._snapshot()
+
+    def wait(self, version, timeout):
+        """Block until the stream moves past `version` (or timeout); returns the snapshot"""
+        with self.changed:
+            self.changed.wait_for(lambda: self.version != version, timeout)
+            return self._snapshot()
+
+    def _update(self, row):
+        self.rows += 1
+        self.last_row = row
+        values = {}
+        for key, raw in row.items():
+            value = _value(raw)
+            if value is not None:
+                values[key] = value
+                self.metrics.setdefault(key, RunningStats()).update(value)
+
+        oee = values.get('OEE')
+        if oee is None and all(c in values for c in OEE_COMPONENTS):
+            oee = values['availability'] * values['performance'] * values['quality']
+            self.metrics.setdefault('OEE', RunningStats()).update(oee)
+        if oee is None:
+            return
+
+        self.window.update(oee)
+        shift = row.get('shift')
+        if shift is not None:
+            self.shifts.setdefault(str(shift), RunningStats()).update(oee)
+
+    def _snapshot(self):
+        return {
+            'streamId': self.stream_id,
+            'version': self.version,
+            'rows': self.rows,
+            'updatedAt': self.updated_at,
+            'metrics': {key: stats.to_dict() for key, stats in self.metrics.items()},
+            'rollingOee': self.window.to_dict(),
+            'shifts': {shift: stats.to_dict() for shift, stats in self.shifts.items()},
+            'lastRow': self.last_row
+        }
+
+
+class LiveStreamRegistry:
+    """In-process live streams, created on first append (at most max_streams at once)"""
+
+    def __init__(self, window_size, max_streams=100):
+        self.window_size = window_size
+        self.max_streams = max_streams
+        self._streams = {}
+        self._lock = threading.Lock()
+
+    def get(self, stream_id, create=False):
+        """The stream, or None if unknown; create=True makes it, raising ValueError at the cap"""
+        with self._lock:
+            stream = self._streams.get(stream_id)
+            if stream is None and create:
+                if len(self._streams) >= self.max_streams:
+                    raise ValueError(f"Too many live streams (limit {self.max_streams})")
+                stream = self._streams[stream_id] = LiveStream(stream_id, self.window_size)
+            return stream
+
+    def remove(self, stream_id):
+        with self._lock:
+            return self._streams.pop(stream_id, None) is not None
@@ -0,0 +1,121 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+from utils.fileio import atomic_write
+
+INDEX_FILE = 'index.json'
+
+
+def cache_key(dataset_hash, model_hash, model_version, analysis_type, params):
+    """Content-addressed key for one analytics result"""
+    material = json.dumps(
+        [dataset_hash, model_hash, model_version, analysis_type, params],
+        sort_keys=True, default=str
+    )
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """Two-tier analytics result cache: a small in-memory LRU over size-bounded JSON files"""
+
+    def __init__(self, cache_folder, max_bytes, memory_entries=64):
+        self.cache_folder = cache_folder
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_folder, exist_ok=True)
+        # key -> {'datasetId', 'modelId', 'size'}; lets uploads/deletes find their entries
+        self._index = self._read_index()
+
+    def path(self, key):
+        return os.path.join(self.cache_folder, f"{key}.json")
+
+    def get(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                return entry
+            if key not in self._index:
+                return None
+        try:
+            with open(self.path(key), 'r') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # Touch the file so size-based eviction drops least recently used entries first
+        os.utime(self.path(key))
+        with self._lock:
+            self._remember(key, entry)
+        return entry
+
+    def put(self, key, entry, dataset_id, model_id):
+        """Store a result entry (a JSON-serializable dict)"""
+        payload = json.dumps(entry)
+        with atomic_write(self.path(key)) as f:
+            f.write(payload)
+        with self._lock:
+            self._remember(key, entry)
+            self._index[key] = {'datasetId': dataset_id, 'modelId': model_id, 'size': len(payload)}
+            self._evict()
+            self._write_index()
+
+    def invalidate(self, dataset_id=None, model_id=None):
+        """Drop every entry computed from the given dataset and/or model"""
+        with self._lock:
+            stale = [
+                key for key, meta in self._index.items()
+                if (dataset_id is not None and meta['datasetId'] == dataset_id)
+                or (model_id is not None and meta['modelId'] == model_id)
+            ]
+            for key in stale:
+                self._drop(key)
+            if stale:
+                self._write_index()
+        return len(stale)
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict(self):
+        total = sum(meta['size'] for meta in self._index.values())
+        if total <= self.max_bytes:
+            return
+
+        def last_used(key):
+            try:
+                return os.path.getmtime(self.path(key))
+            except OSError:
+                return 0
+
+        for key in sorted(self._index, key=last_used):
+            if total <= self.max_bytes:
+                break
+            total -= self._index[key]['size']
+            self._drop(key)
+
+    def _drop(self, key):
+        self._index.pop(key, None)
+        self._memory.pop(key, None)
+        if os.path.exists(self.path(key)):
+            os.remove(self.path(key))
+
+    def _read_index(self):
+        try:
+            with open(os.path.join(self.cache_folder, INDEX_FILE), 'r') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # Entries whose file disappeared are not worth keeping
+        return {key: meta for key, meta in index.items() if os.path.exists(self.path(key))}
+
+    def _write_index(self):
+        with atomic_write(os.path.join(self.cache_folder, INDEX_FILE)) as f:
+            json.dump(self._index, f)
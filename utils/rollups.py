@@ -0,0 +1,260 @@
+import os
+import json
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+
+from utils.dataset_store import TIMESTAMP_COLUMN, align_timestamp, file_signature
+from utils.fileio import atomic_path, atomic_write
+
+# Levels kept in the index. 'shift' buckets are per (day, shift).
+GRANULARITIES = ['hour', 'day', 'week', 'month', 'shift']
+STATS = ['sum', 'count', 'min', 'max']
+SHIFT_COLUMN = 'shift'
+
+# How each stored statistic combines when buckets are merged
+COMBINE = {'sum': 'sum', 'count': 'sum', 'min': 'min', 'max': 'max'}
+# Statistics a query can ask for: the stored ones plus the mean derived from sum/count
+QUERY_STATS = ['mean'] + STATS
+
+
+def _stat_columns(frame):
+    return {column: COMBINE[column.rsplit('_', 1)[1]] for column in frame.columns}
+
+
+def _aggregate(values, keys):
+    """sum/count/min/max of every metric column per bucket key"""
+    grouped = values.groupby(keys, observed=True, sort=True).agg(STATS)
+    grouped.columns = [f"{metric}_{stat}" for metric, stat in grouped.columns]
+    return grouped
+
+
+def _combine(frame, keys=None, level=None):
+    """Merge partial buckets that share a key (used by coarsening and appends)"""
+    return frame.groupby(keys, level=level, observed=True, sort=True).agg(_stat_columns(frame))
+
+
+def _bucket_start(timestamps, granularity):
+    if granularity == 'hour':
+        return timestamps.floor('h')
+    if granularity == 'day':
+        return timestamps.floor('D')
+    if granularity == 'week':
+        return timestamps.to_period('W').start_time
+    return timestamps.to_period('M').start_time
+
+
+def _parse_bound(value, name, tz=None):
+    if value is None:
+        return None
+    try:
+        bound = pd.Timestamp(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid {name} timestamp: {value!r}")
+    # Buckets are in the dataset's own zone (naive for most files); e.g. a "...Z" bound is converted
+    return align_timestamp(bound, tz)
+
+
+class RollupIndex:
+    """Pre-aggregated time buckets for one dataset
+
+    Raw rows are only touched when building the hourly and per-shift levels; day, week
+    and month are coarsened from the hourly buckets, and queries read buckets only.
+    """
+
+    def __init__(self, levels):
+        self.levels = levels
+
+    @classmethod
+    def build(cls, df, metrics=None):
+        """Index the numeric columns of a typed frame, or exactly `metrics` when given"""
+        if TIMESTAMP_COLUMN not in df.columns or not pd.api.types.is_datetime64_any_dtype(df[TIMESTAMP_COLUMN]):
+            raise ValueError(f"Rollups need a '{TIMESTAMP_COLUMN}' column")
+        df = df[df[TIMESTAMP_COLUMN].notna()]
+        if metrics is None:
+            values = df.select_dtypes('number').astype(np.float64)
+        else:
+            values = pd.DataFrame({
+                metric: pd.to_numeric(df[metric], errors='coerce') if metric in df.columns else np.nan
+                for metric in metrics
+            }, index=df.index).astype(np.float64)
+        timestamps = df[TIMESTAMP_COLUMN]
+
+        hourly = _aggregate(values, pd.Index(timestamps.dt.floor('h').to_numpy(), name='bucket'))
+        levels = {'hour': hourly}
+        levels.update(cls._coarsen(hourly))
+        if SHIFT_COLUMN in df.columns:
+            keys = [
+                pd.Index(timestamps.dt.floor('D').to_numpy(), name='bucket'),
+                pd.Index(df[SHIFT_COLUMN].astype(str).to_numpy(), name=SHIFT_COLUMN)
+            ]
+            levels['shift'] = _aggregate(values, keys)
+        return cls(levels)
+
+    @staticmethod
+    def _coarsen(hourly):
+        levels = {}
+        for granularity in ('day', 'week', 'month'):
+            keys = pd.Index(_bucket_start(hourly.index, granularity), name='bucket')
+            levels[granularity] = _combine(hourly, keys)
+        return levels
+
+    def merge(self, df):
+        """Fold newly appended rows in; cost is proportional to the new rows plus touched buckets
+
+        Only the metrics already indexed are merged, so columns the appended rows leave
+        empty (e.g. machine_id) do not turn into metrics.
+        """
+        update = RollupIndex.build(df, self.metrics())
+        for granularity, frame in update.levels.items():
+            current = self.levels.get(granularity)
+            if current is None:
+                self.levels[granularity] = frame
+                continue
+            merged = pd.concat([current, frame])
+            self.levels[granularity] = _combine(merged, level=list(range(merged.index.nlevels)))
+        return self
+
+    def metrics(self):
+        """Indexed metric columns, in index order"""
+        frame = self.levels.get('hour')
+        if frame is None:
+            return None
+        return list(dict.fromkeys(column.rsplit('_', 1)[0] for column in frame.columns))
+
+    def query(self, granularity='day', start=None, end=None, metrics=None, stats=None):
+        """Bucket rows between start and end, with mean plus the requested statistics"""
+        if granularity not in self.levels:
+            raise ValueError(f"Unknown or unavailable granularity '{granularity}'")
+        stats = stats or ['mean', 'min', 'max', 'count']
+        unknown = [s for s in stats if s not in QUERY_STATS]
+        if unknown:
+            raise ValueError(f"Unknown stats: {unknown}. Expected any of {QUERY_STATS}")
+        frame = self.levels[granularity]
+        tz = getattr(frame.index.get_level_values(0).dtype, 'tz', None)
+        start, end = _parse_bound(start, 'start', tz), _parse_bound(end, 'end', tz)
+
+        # The bucket index is sorted, so this slice is a binary search
+        if start is not None or end is not None:
+            frame = frame.loc[start:end] if frame.index.nlevels == 1 else frame.loc[(slice(start, end), slice(None)), :]
+
+        available = sorted({column.rsplit('_', 1)[0] for column in frame.columns})
+        metrics = metrics or available
+        missing = [m for m in metrics if m not in available]
+        if missing:
+            raise ValueError(f"Unknown metrics: {missing}")
+
+        if granularity == 'shift':
+            # Collapse the per-day shift buckets in range into one row per shift
+            frame = _combine(frame, level=SHIFT_COLUMN)
+
+        out = pd.DataFrame(index=frame.index)
+        for metric in metrics:
+            count = frame[f"{metric}_count"]
+            for stat in stats:
+                if stat == 'mean':
+                    out[f"{metric}_mean"] = frame[f"{metric}_sum"] / count.where(count > 0)
+                else:
+                    out[f"{metric}_{stat}"] = frame[f"{metric}_{stat}"]
+        return out.reset_index()
+
+    def save(self, folder):
+        os.makedirs(folder, exist_ok=True)
+        for granularity, frame in self.levels.items():
+            with atomic_path(os.path.join(folder, f"{granularity}.parquet")) as tmp_path:
+                frame.to_parquet(tmp_path)
+
+    @classmethod
+    def load(cls, folder):
+        levels = {}
+        for granularity in GRANULARITIES:
+            path = os.path.join(folder, f"{granularity}.parquet")
+            if os.path.exists(path):
+                levels[granularity] = pd.read_parquet(path)
+        return cls(levels)
+
+
+class RollupStore:
+    """Rollup indexes on disk (one folder per dataset), keyed on the raw file signature"""
+
+    def __init__(self, folder, dataset_store):
+        self.folder = folder
+        self.dataset_store = dataset_store
+        self._indexes = {}
+        self._lock = threading.Lock()
+        os.makedirs(self.folder, exist_ok=True)
+
+    def path(self, dataset_id):
+        return os.path.join(self.folder, dataset_id)
+
+    def signature_path(self, dataset_id):
+        return os.path.join(self.path(dataset_id), 'signature.json')
+
+    def build(self, dataset_id, df=None):
+        """(Re)build the index for a dataset from its typed frame"""
+        signature = file_signature(self.dataset_store.source_path(dataset_id))
+        index = RollupIndex.build(df if df is not None else self.dataset_store.load(dataset_id))
+        self._save(dataset_id, index, signature)
+        return index
+
+    def get(self, dataset_id):
+        """The dataset's index, rebuilt only if the raw file changed since it was built"""
+        signature = file_signature(self.dataset_store.source_path(dataset_id))
+        with self._lock:
+            known = self._indexes.get(dataset_id)
+        if known is not None and known[0] == signature:
+            return known[1]
+
+        stored = self._stored_signature(dataset_id)
+        if stored == signature:
+            index = RollupIndex.load(self.path(dataset_id))
+            with self._lock:
+                self._indexes[dataset_id] = (signature, index)
+            return index
+        return self.build(dataset_id)
+
+    def merge(self, dataset_id, rows, previous_signature):
+        """Merge rows that were just appended to the dataset's raw file
+
+        previous_signature is the file signature from before the append; an index built from
+        any other version of the file (e.g. one that missed an earlier append) is rebuilt instead.
+        """
+        signature = file_signature(self.dataset_store.source_path(dataset_id))
+        index = self.get_current(dataset_id, previous_signature)
+        if index is None:
+            return self.build(dataset_id)
+        index.merge(rows)
+        self._save(dataset_id, index, signature)
+        return index
+
+    def get_current(self, dataset_id, signature):
+        """Index built from the file with the given signature, or None"""
+        with self._lock:
+            known = self._indexes.get(dataset_id)
+        if known is not None and known[0] == signature:
+            return known[1]
+        if self._stored_signature(dataset_id) == signature:
+            return RollupIndex.load(self.path(dataset_id))
+        return None
+
+    def invalidate(self, dataset_id):
+        with self._lock:
+            self._indexes.pop(dataset_id, None)
+        if os.path.isdir(self.path(dataset_id)):
+            shutil.rmtree(self.path(dataset_id))
+
+    def _save(self, dataset_id, index, signature):
+        index.save(self.path(dataset_id))
+        with atomic_write(self.signature_path(dataset_id)) as f:
+            json.dump(signature, f)
+        with self._lock:
+            self._indexes[dataset_id] = (signature, index)
+
+    def _stored_signature(self, dataset_id):
+        try:
+            with open(self.signature_path(dataset_id), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
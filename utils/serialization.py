@@ -0,0 +1,193 @@
+import io
+import json
+import zlib
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from utils.dataset_query import iter_json
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional; gzip is always available
+    zstandard = None
+
+# Response formats -> media type. 'records' (a list of row objects) stays the default.
+FORMATS = {
+    'records': 'application/json',
+    'columnar': 'application/vnd.oee360.columnar+json',
+    'arrow': 'application/vnd.apache.arrow.stream'
+}
+COMPRESSION_LEVELS = {'gzip': 6, 'zstd': 3}
+METADATA_KEY = b'oee360'
+
+
+def encodings():
+    """Content encodings this process can produce, preferred first"""
+    return (['zstd'] if zstandard is not None else []) + ['gzip']
+
+
+def negotiate_format(args, accept):
+    """Pick a format from ?format= or the Accept header (a werkzeug MIMEAccept)"""
+    requested = args.get('format')
+    if requested:
+        if requested not in FORMATS:
+            raise ValueError(f"Unknown format '{requested}'. Expected one of {list(FORMATS)}")
+        return requested
+    best = accept.best_match(list(FORMATS.values()), default=FORMATS['records'])
+    return next(name for name, mimetype in FORMATS.items() if mimetype == best)
+
+
+def negotiate_encoding(args, accept_encodings):
+    """Pick a compression from ?compress= or the Accept-Encoding header; None for identity"""
+    requested = args.get('compress')
+    if requested:
+        if requested in ('none', 'identity'):
+            return None
+        if requested not in encodings():
+            raise ValueError(f"Unsupported compression '{requested}'. Available: {encodings()}")
+        return requested
+    return accept_encodings.best_match(encodings(), default=None)
+
+
+def compress(chunks, encoding):
+    """Compress a stream of str/bytes chunks incrementally"""
+    if encoding == 'zstd':
+        compressor = zstandard.ZstdCompressor(level=COMPRESSION_LEVELS['zstd']).compressobj()
+    else:
+        # wbits=31 writes the gzip container rather than a bare zlib stream
+        compressor = zlib.compressobj(COMPRESSION_LEVELS['gzip'], zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8') if isinstance(chunk, str) else chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+# Columnar JSON
+
+def _json_array(series):
+    """JSON array text for one column, built from the NumPy buffer where possible"""
+    values = series.to_numpy()
+    if values.dtype.kind in 'iu':
+        items = values.astype(str)
+    elif values.dtype.kind == 'f':
+        # str() of a float32 is its shortest round-trip repr, far shorter than the float64 one
+        items = np.where(np.isfinite(values), values.astype(str), 'null')
+    elif values.dtype.kind == 'b':
+        items = np.where(values, 'true', 'false')
+    elif values.dtype.kind == 'M':
+        text = np.datetime_as_string(values.astype('datetime64[s]'), unit='s')
+        items = np.where(np.isnat(values), 'null', np.char.add(np.char.add('"', text), '"'))
+    else:
+        if pd.api.types.is_datetime64_any_dtype(series):
+            series = series.dt.strftime('%Y-%m-%dT%H:%M:%S')
+        return json.dumps(series.astype(object).where(series.notna(), None).tolist())
+    return '[' + ','.join(items.tolist()) + ']'
+
+
+def iter_columnar_json(df, header, chunk_rows):
+    """Yield {**header, "format": "columnar", "data": {column: [...]}} a column slice at a time"""
+    opening = json.dumps({**header, 'format': 'columnar'})
+    yield opening[:-1] + ', "data": {'
+    for i, column in enumerate(df.columns):
+        yield (', ' if i else '') + json.dumps(str(column)) + ': ['
+        series = df[column]
+        for start in range(0, len(df), chunk_rows):
+            body = _json_array(series.iloc[start:start + chunk_rows])[1:-1]
+            yield body if start == 0 else ',' + body
+        yield ']'
+    yield '}}'
+
+
+# Arrow IPC
+
+def iter_arrow(df, header, chunk_rows):
+    """Yield an Arrow IPC stream of the frame, one record batch per chunk; header goes in the schema metadata"""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), METADATA_KEY: json.dumps(header)})
+    sink = io.BytesIO()
+    writer = pa.ipc.new_stream(sink, table.schema)
+
+    def drain():
+        data = sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+        return data
+
+    yield drain()
+    for batch in table.to_batches(max_chunksize=chunk_rows):
+        writer.write_batch(batch)
+        yield drain()
+    writer.close()
+    yield drain()
+
+
+def iter_frame(df, header, fmt, chunk_rows):
+    if fmt == 'arrow':
+        return iter_arrow(df, header, chunk_rows)
+    if fmt == 'columnar':
+        return iter_columnar_json(df, header, chunk_rows)
+    return iter_json(df, header, chunk_rows)
+
+
+# Forecast results
+
+def forecast_columns(series):
+    """Forecast series as parallel arrays instead of one object per series"""
+    return {
+        'group': [s['group'] for s in series],
+        'metric': [s['metric'] for s in series],
+        'forecast': [s['forecast'] for s in series],
+        'timestamps': [s['timestamps'] for s in series],
+        'mae': [s['backtest']['mae'] if s['backtest'] else None for s in series],
+        'rmse': [s['backtest']['rmse'] if s['backtest'] else None for s in series],
+        'points': [s['backtest']['points'] if s['backtest'] else None for s in series]
+    }
+
+
+def forecast_frame(series):
+    """Long table of forecast points: one row per (series, step)"""
+    horizon = [len(s['forecast']) for s in series]
+    timestamps = [s['timestamps'] or [None] * n for s, n in zip(series, horizon)]
+    return pd.DataFrame({
+        'group': pd.Categorical(np.repeat([str(s['group']) for s in series], horizon)),
+        'metric': pd.Categorical(np.repeat([s['metric'] for s in series], horizon)),
+        'step': np.concatenate([np.arange(1, n + 1) for n in horizon]) if series else np.array([], dtype=int),
+        'timestamp': pd.to_datetime([t for ts in timestamps for t in ts]),
+        'forecast': np.array([v for s in series for v in s['forecast']], dtype=np.float64)
+    })
+
+
+def _with_results(payload, path, results):
+    """Copy of payload with the dict at path replaced by results"""
+    if not path:
+        return results
+    return {**payload, path[0]: _with_results(payload[path[0]], path[1:], results)}
+
+
+def iter_results(payload, path, fmt, chunk_rows):
+    """Encode an analytics payload whose results live at payload[path...]
+
+    columnar turns the forecast series into parallel arrays; arrow streams the forecast
+    points as a table with the rest of the payload in the schema metadata. Raises
+    ValueError for arrow when there is no forecast to tabulate.
+    """
+    results = payload
+    for key in path:
+        results = results[key]
+    forecast = results.get('forecast') if isinstance(results, dict) else None
+
+    if fmt == 'records':
+        return iter([json.dumps(payload)])
+    if fmt == 'columnar':
+        if forecast:
+            results = {**results, 'forecast': {**forecast, 'series': forecast_columns(forecast['series'])}}
+        return iter([json.dumps({**_with_results(payload, path, results), 'format': 'columnar'})])
+
+    if not forecast:
+        raise ValueError('Arrow output is only available for forecast results')
+    summary = [{'group': s['group'], 'metric': s['metric'], 'backtest': s['backtest']} for s in forecast['series']]
+    results = {**results, 'forecast': {**forecast, 'series': summary}}
+    return iter_arrow(forecast_frame(forecast['series']), _with_results(payload, path, results), chunk_rows)
@@ -0,0 +1,81 @@
+import time
+from datetime import datetime
+
+from utils.analytics import run_analysis
+from utils.dataset_store import DatasetStore
+from utils.forecasting import PREDEFINED_MODELS, is_predefined
+from utils.model_loader import ModelRegistry
+from utils.metrics import phase
+
+# Stores owned by this worker process, opened once by init_worker and reused by every job
+_worker_state = {}
+
+
+def init_worker(config):
+    """Process-pool initializer: open this worker's stores and warm the configured models
+
+    config carries this process's share of the frame and model cache budgets.
+    """
+    model_registry = ModelRegistry(config['MODEL_FOLDER'], config['MODEL_CACHE_MAX_BYTES'])
+    model_registry.warm(config.get('MODEL_PREWARM', []))
+    _worker_state['stores'] = (
+        DatasetStore(config['DATASET_FOLDER'], config['DATASET_CACHE_FOLDER'], config['FRAME_CACHE_MAX_BYTES']),
+        model_registry
+    )
+
+
+def worker_stores():
+    return _worker_state['stores']
+
+
+def load_model(model_registry, model_id):
+    """Resolve a model id to (loaded model object or None, summary for the response)"""
+    if is_predefined(model_id):
+        return None, {'id': model_id, 'loaded': True, 'type': 'predefined', 'method': PREDEFINED_MODELS[model_id]}
+
+    model_info = {'id': model_id, 'loaded': False}
+    if not model_registry.supports(model_id):
+        return None, model_info
+    model_entry = model_registry.get(model_id)
+    model_info.update({
+        'loaded': True,
+        'type': type(model_entry['model']).__name__,
+        'version': model_entry['metadata'].get('version', '1.0')
+    })
+    return model_entry['model'], model_info
+
+
+def run_analytics_task(dataset_store, model_registry, dataset_id, model_id, analysis_type, params=None):
+    """Load inputs and run one analysis; returns the results plus timing
+
+    phases holds the load/compute split so jobs run in worker processes can be
+    reported by the parent's metrics.
+    """
+    started_at = datetime.now().isoformat()
+    started = time.perf_counter()
+
+    with phase('load') as load:
+        model, model_info = load_model(model_registry, model_id)
+        df = dataset_store.load(dataset_id)
+        # Cheap once loaded: parsing the file stored its content hash
+        dataset_hash = dataset_store.signature(dataset_id)['sha256']
+    with phase('compute') as compute:
+        results = run_analysis(df, analysis_type, params, model_id, model)
+    results['model'] = model_info
+
+    return {
+        'results': results,
+        'startedAt': started_at,
+        'finishedAt': datetime.now().isoformat(),
+        'computeSeconds': time.perf_counter() - started,
+        'datasetSha256': dataset_hash,
+        'phases': {'load': load.seconds, 'compute': compute.seconds}
+    }
+
+
+def analytics_worker(dataset_id, model_id, analysis_type, params=None):
+    """Process-pool entry point for an analytics job"""
+    dataset_store, model_registry = worker_stores()
+    # The job pool already spreads jobs over the cores; a nested forecasting pool per job would oversubscribe them
+    params = {**(params or {}), 'jobs': 1}
+    return run_analytics_task(dataset_store, model_registry, dataset_id, model_id, analysis_type, params)
@@ -0,0 +1,300 @@
+import numpy as np
+import pandas as pd
+
+from utils.dataset_store import TIMESTAMP_COLUMN
+
+# Same expectations as scripts/validate_data.py
+REQUIRED_COLUMNS = [
+    'timestamp', 'OEE', 'availability', 'performance', 'quality',
+    'temp', 'humidity', 'machine_speed', 'vibration', 'pressure',
+    'power_consumption', 'hour_of_day', 'day_of_week', 'month'
+]
+
+RANGE_CHECKS = {
+    'OEE': (0, 1),
+    'availability': (0, 1),
+    'performance': (0, 1),
+    'quality': (0, 1),
+    'temp': (-50, 100),
+    'humidity': (0, 100)
+}
+
+# How many offending row offsets to keep per problem
+MAX_OFFENDING_ROWS = 20
+
+# Timestamps are checked per series: one series per machine when the column exists
+SERIES_COLUMNS = ['machine_id']
+# A step longer than this many expected intervals counts as a gap
+GAP_FACTOR = 1.5
+
+
+def _offsets(mask, row_offset, limit=MAX_OFFENDING_ROWS):
+    positions = np.flatnonzero(np.asarray(mask, dtype=bool))[:limit]
+    return [int(row_offset + p) for p in positions]
+
+
+def _merge_offsets(a, b):
+    return sorted(a + b)[:MAX_OFFENDING_ROWS]
+
+
+def infer_interval(df, series_columns=None):
+    """Typical sampling step in ns (median positive step within each series), or None"""
+    if TIMESTAMP_COLUMN not in df.columns or not pd.api.types.is_datetime64_any_dtype(df[TIMESTAMP_COLUMN]):
+        return None
+    steps = _series_steps(df, series_columns)[0]
+    steps = steps[steps > 0]
+    return int(np.median(steps)) if len(steps) else None
+
+
+def _series_key(df, series_columns=None):
+    key = [c for c in (SERIES_COLUMNS if series_columns is None else series_columns) if c in df.columns]
+    return key[0] if key else None
+
+
+def _series_steps(df, series_columns=None):
+    """Steps between consecutive timestamps of the same series, in file order
+
+    Returns (steps ns, row position of the later row of each step, series labels, timestamps ns,
+    row positions) with the last three sorted by series, NaT rows dropped.
+    """
+    timestamps = df[TIMESTAMP_COLUMN]
+    present = timestamps.notna().to_numpy()
+    positions = np.flatnonzero(present)
+    values = timestamps.to_numpy(dtype='datetime64[ns]')[present].view(np.int64)
+    key = _series_key(df, series_columns)
+    if key is None:
+        labels = np.zeros(len(values), dtype=np.int64)
+        names = np.array([''], dtype=object)
+    else:
+        labels, names = pd.factorize(df[key].to_numpy()[present], use_na_sentinel=False)
+        names = np.asarray(names, dtype=object).astype(str)
+    order = np.argsort(labels, kind='stable')
+    labels, values, positions = labels[order], values[order], positions[order]
+    same = labels[1:] == labels[:-1]
+    steps = (values[1:] - values[:-1])[same]
+    return steps, positions[1:][same], names[labels], values, positions
+
+
+class SequenceReport:
+    """Duplicate, out-of-order and gap checks on the timestamp column, per series
+
+    Chunks are folded in with update(); reports over consecutive row ranges are joined with
+    merge(), which also checks the step across the boundary between them.
+    """
+
+    def __init__(self, interval=None, series_columns=None):
+        self.interval = interval
+        self.series_columns = series_columns
+        self.series_key = None
+        self.steps = 0
+        self.counts = {'duplicates': 0, 'outOfOrder': 0, 'gaps': 0}
+        self.rows = {'duplicates': [], 'outOfOrder': [], 'gaps': []}
+        self.max_gap = 0
+        # series -> [(first ns, first row), (last ns, last row)]
+        self.ends = {}
+
+    def update(self, df, row_offset=0):
+        if TIMESTAMP_COLUMN not in df.columns or not pd.api.types.is_datetime64_any_dtype(df[TIMESTAMP_COLUMN]):
+            return
+        if self.interval is None:
+            self.interval = infer_interval(df, self.series_columns)
+        self.series_key = self.series_key or _series_key(df, self.series_columns)
+        steps, later_rows, names, values, positions = _series_steps(df, self.series_columns)
+        self._count(steps, later_rows + row_offset)
+
+        chunk = SequenceReport(self.interval, self.series_columns)
+        if len(values):
+            starts = np.flatnonzero(np.r_[True, names[1:] != names[:-1]])
+            ends = np.r_[starts[1:], len(values)] - 1
+            for start, end in zip(starts, ends):
+                chunk.ends[names[start]] = [
+                    (int(values[start]), int(positions[start] + row_offset)),
+                    (int(values[end]), int(positions[end] + row_offset))
+                ]
+        self._join(chunk)
+
+    def _count(self, steps, later_rows):
+        self.steps += len(steps)
+        problems = {'duplicates': steps == 0, 'outOfOrder': steps < 0}
+        if self.interval:
+            problems['gaps'] = steps > self.interval * GAP_FACTOR
+            if problems['gaps'].any():
+                self.max_gap = max(self.max_gap, int(steps.max()))
+        for name, mask in problems.items():
+            if mask.any():
+                self.counts[name] += int(mask.sum())
+                # Steps come grouped by series, so sort before keeping the earliest rows
+                rows = np.sort(later_rows[mask])[:MAX_OFFENDING_ROWS]
+                self.rows[name] = _merge_offsets(self.rows[name], [int(r) for r in rows])
+
+    def _join(self, other):
+        """Attach the ends of a later row range, checking each series' step across the boundary"""
+        boundary_steps, boundary_rows = [], []
+        for name, (first, last) in other.ends.items():
+            ours = self.ends.get(name)
+            if ours is None:
+                self.ends[name] = [first, last]
+                continue
+            boundary_steps.append(first[0] - ours[1][0])
+            boundary_rows.append(first[1])
+            ours[1] = last
+        if boundary_steps:
+            self._count(np.array(boundary_steps, dtype=np.int64), np.array(boundary_rows, dtype=np.int64))
+
+    def merge(self, other, row_offset=0):
+        """Combine the report of the rows that follow this one (other's offsets shifted by row_offset)"""
+        if self.interval is None:
+            self.interval = other.interval
+        self.series_key = self.series_key or other.series_key
+        self.steps += other.steps
+        self.max_gap = max(self.max_gap, other.max_gap)
+        for name in self.counts:
+            self.counts[name] += other.counts[name]
+            self.rows[name] = _merge_offsets(self.rows[name], [r + row_offset for r in other.rows[name]])
+        shifted = SequenceReport(self.interval, self.series_columns)
+        shifted.ends = {
+            name: [(first[0], first[1] + row_offset), (last[0], last[1] + row_offset)]
+            for name, (first, last) in other.ends.items()
+        }
+        self._join(shifted)
+        return self
+
+    def to_dict(self):
+        return {
+            'column': TIMESTAMP_COLUMN,
+            'seriesColumn': self.series_key,
+            'series': len(self.ends),
+            'expectedIntervalSeconds': self.interval / 1e9 if self.interval else None,
+            'monotonic': self.counts['outOfOrder'] == 0,
+            'duplicates': self.counts['duplicates'],
+            'duplicateRows': self.rows['duplicates'],
+            'outOfOrder': self.counts['outOfOrder'],
+            'outOfOrderRows': self.rows['outOfOrder'],
+            'gaps': self.counts['gaps'],
+            'gapRows': self.rows['gaps'],
+            'maxGapSeconds': self.max_gap / 1e9 if self.max_gap else None
+        }
+
+
+class ValidationReport:
+    """Per-column validation statistics accumulated chunk by chunk
+
+    Reports built over separate chunks can be combined with merge().
+    """
+
+    def __init__(self, required_columns=None, range_checks=None, interval=None):
+        self.required_columns = REQUIRED_COLUMNS if required_columns is None else required_columns
+        self.range_checks = RANGE_CHECKS if range_checks is None else range_checks
+        self.rows = 0
+        self.columns = {}
+        self.missing_columns = []
+        self.sequence = SequenceReport(interval)
+
+    def check_columns(self, columns):
+        self.missing_columns = [c for c in self.required_columns if c not in columns]
+
+    def update(self, df, invalid=None, row_offset=0):
+        """Fold one typed chunk into the report
+
+        invalid maps column -> boolean mask of cells that were present but failed type conversion.
+        """
+        invalid = invalid or {}
+        self.rows += len(df)
+        self.sequence.update(df, row_offset)
+        for column in df.columns:
+            series = df[column]
+            stats = self.columns.setdefault(str(column), {
+                'dtype': str(series.dtype),
+                'count': 0,
+                'nulls': 0,
+                'invalid': 0,
+                'invalidRows': [],
+                'min': None,
+                'max': None
+            })
+            nulls = series.isna()
+            stats['count'] += int(len(series) - nulls.sum())
+            stats['nulls'] += int(nulls.sum())
+
+            if column in invalid and invalid[column].any():
+                stats['invalid'] += int(invalid[column].sum())
+                stats['invalidRows'] = _merge_offsets(stats['invalidRows'], _offsets(invalid[column], row_offset))
+
+            if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_datetime64_any_dtype(series):
+                if stats['count'] and not nulls.all():
+                    low, high = series.min(), series.max()
+                    stats['min'] = low if stats['min'] is None else min(stats['min'], low)
+                    stats['max'] = high if stats['max'] is None else max(stats['max'], high)
+
+            if column in self.range_checks and pd.api.types.is_numeric_dtype(series):
+                low, high = self.range_checks[column]
+                outside = (series < low) | (series > high)
+                if outside.any():
+                    stats['outOfRange'] = stats.get('outOfRange', 0) + int(outside.sum())
+                    stats['outOfRangeRows'] = _merge_offsets(
+                        stats.get('outOfRangeRows', []), _offsets(outside, row_offset)
+                    )
+
+    def merge(self, other, row_offset=0):
+        """Combine the report of the rows that follow this one
+
+        row_offset is added to other's row offsets (for reports built with chunk-relative offsets).
+        """
+        self.rows += other.rows
+        self.sequence.merge(other.sequence, row_offset)
+        for column, theirs in other.columns.items():
+            theirs = dict(theirs)
+            for field in ('invalidRows', 'outOfRangeRows'):
+                if field in theirs:
+                    theirs[field] = [r + row_offset for r in theirs[field]]
+            ours = self.columns.get(column)
+            if ours is None:
+                self.columns[column] = theirs
+                continue
+            for field in ('count', 'nulls', 'invalid', 'outOfRange'):
+                if field in theirs:
+                    ours[field] = ours.get(field, 0) + theirs[field]
+            for field in ('invalidRows', 'outOfRangeRows'):
+                if field in theirs:
+                    ours[field] = _merge_offsets(ours.get(field, []), theirs[field])
+            for field, pick in (('min', min), ('max', max)):
+                if theirs[field] is not None:
+                    ours[field] = theirs[field] if ours[field] is None else pick(ours[field], theirs[field])
+        return self
+
+    @property
+    def valid(self):
+        if self.missing_columns:
+            return False
+        return not any(stats['invalid'] for stats in self.columns.values())
+
+    def to_dict(self):
+        columns = {}
+        for column, stats in self.columns.items():
+            stats = dict(stats)
+            for field in ('min', 'max'):
+                value = stats[field]
+                if isinstance(value, pd.Timestamp):
+                    stats[field] = value.isoformat()
+                elif value is not None:
+                    stats[field] = float(value)
+            if column in self.range_checks:
+                stats['expectedRange'] = list(self.range_checks[column])
+            columns[column] = stats
+
+        warnings = [
+            f"{column}: {stats['outOfRange']} values outside expected range {list(self.range_checks[column])}"
+            for column, stats in self.columns.items() if stats.get('outOfRange')
+        ]
+        sequence = self.sequence.to_dict()
+        for field, label in (('duplicates', 'duplicate'), ('outOfOrder', 'out-of-order'), ('gaps', 'gap')):
+            if sequence[field]:
+                warnings.append(f"{TIMESTAMP_COLUMN}: {sequence[field]} {label} steps")
+        return {
+            'valid': self.valid,
+            'rows': self.rows,
+            'missingColumns': self.missing_columns,
+            'warnings': warnings,
+            'columns': columns,
+            'timestamps': sequence
+        }
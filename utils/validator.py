@@ -0,0 +1,139 @@
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from utils.dataset_store import coerce_types, read_raw_dataset
+from utils.ingest import infer_schema, apply_schema
+from utils.validation import ValidationReport, infer_interval
+
+DEFAULT_CHUNK_ROWS = 200000
+# Files are only split across processes in ranges of at least this many bytes
+MIN_RANGE_BYTES = 32 * 1024 * 1024
+# Rows read up front to infer the schema and sampling interval shared by every range
+SAMPLE_ROWS = 10000
+
+
+class _RangeReader(io.RawIOBase):
+    """Readable view of bytes [start, end) of a file"""
+
+    def __init__(self, f, start, end):
+        self.f = f
+        self.remaining = end - start
+        f.seek(start)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self.remaining <= 0:
+            return 0
+        data = self.f.read(min(len(buffer), self.remaining))
+        size = len(data)
+        buffer[:size] = data
+        self.remaining -= size
+        return size
+
+
+def split_ranges(path, parts):
+    """Header columns plus up to `parts` line-aligned byte ranges covering the rows of a CSV
+
+    Rows must not contain quoted newlines (true of OEE and historian exports).
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        header_line = f.readline()
+        data_start = f.tell()
+        boundaries = [data_start]
+        for i in range(1, parts):
+            target = data_start + (size - data_start) * i // parts
+            if target <= boundaries[-1]:
+                continue
+            f.seek(target - 1)
+            f.readline()  # finish the line the target falls in
+            if f.tell() >= size:
+                break
+            if f.tell() > boundaries[-1]:
+                boundaries.append(f.tell())
+        boundaries.append(size)
+    ranges = [(start, end) for start, end in zip(boundaries[:-1], boundaries[1:]) if end > start]
+    header = pd.read_csv(io.BytesIO(header_line), nrows=0).columns.tolist()
+    return header, ranges
+
+
+def sample_file(path, rows=SAMPLE_ROWS):
+    """Schema and sampling interval inferred from the first rows of a CSV"""
+    sample = pd.read_csv(path, nrows=rows)
+    schema = infer_schema(sample)
+    typed, _ = apply_schema(sample, schema)
+    return schema, infer_interval(typed)
+
+
+def validate_range(path, start, end, header, schema, options):
+    """Validate one byte range of a CSV; row offsets in the report are relative to the range"""
+    report = ValidationReport(options.get('required_columns'), options.get('range_checks'), options.get('interval'))
+    report.check_columns(header)
+    row_offset = 0
+    with open(path, 'rb') as f:
+        reader = io.BufferedReader(_RangeReader(f, start, end), buffer_size=1024 * 1024)
+        # low_memory=False: mixed-type columns are left to apply_schema instead of warning per block
+        chunks = pd.read_csv(reader, header=None, names=header, low_memory=False,
+                             chunksize=options.get('chunk_rows', DEFAULT_CHUNK_ROWS))
+        for chunk in chunks:
+            typed, invalid = apply_schema(chunk, schema)
+            report.update(typed, invalid, row_offset)
+            row_offset += len(chunk)
+    return report
+
+
+def validate_frame(df, required_columns=None, range_checks=None, interval=None):
+    """Validate an in-memory (already parsed) dataset, e.g. a JSON upload"""
+    report = ValidationReport(required_columns, range_checks, interval)
+    report.check_columns(list(df.columns))
+    report.update(coerce_types(df))
+    return report
+
+
+def validate_file(path, workers=None, chunk_rows=DEFAULT_CHUNK_ROWS, required_columns=None,
+                  range_checks=None, interval=None, executor=None):
+    """Validate a dataset file in one pass, splitting large CSVs across worker processes
+
+    Every range, null, type, duplicate-timestamp, gap and ordering check runs per chunk and
+    the per-range reports are merged in file order. interval (ns) is the expected sampling
+    step; it is inferred from the first rows when not given. Ranges run on executor when
+    given (a long-lived, shared pool of `workers` processes), else on a pool created for
+    this call. Returns a ValidationReport.
+    """
+    if not path.endswith('.csv'):
+        return validate_frame(read_raw_dataset(path), required_columns, range_checks, interval)
+    if os.path.getsize(path) == 0:
+        raise ValueError('Dataset is empty')
+
+    schema, sampled_interval = sample_file(path)
+    options = {
+        'required_columns': required_columns,
+        'range_checks': range_checks,
+        'interval': interval or sampled_interval,
+        'chunk_rows': chunk_rows
+    }
+    workers = workers or os.cpu_count() or 1
+    parts = max(1, min(workers * 2, os.path.getsize(path) // MIN_RANGE_BYTES))
+    header, ranges = split_ranges(path, parts)
+
+    if len(ranges) <= 1 or workers == 1:
+        reports = [validate_range(path, start, end, header, schema, options) for start, end in ranges]
+    else:
+        pool = executor or ProcessPoolExecutor(max_workers=min(workers, len(ranges)))
+        try:
+            futures = [pool.submit(validate_range, path, start, end, header, schema, options) for start, end in ranges]
+            reports = [future.result() for future in futures]
+        finally:
+            if executor is None:
+                pool.shutdown()
+
+    report = ValidationReport(required_columns, range_checks, options['interval'])
+    report.check_columns(header)
+    for part in reports:
+        report.merge(part, row_offset=report.rows)
+    return report